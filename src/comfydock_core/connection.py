@@ -1,6 +1,8 @@
 # Add to imports
+import asyncio
+import uuid
 from fastapi import WebSocket
-from typing import Dict
+from typing import Dict, Union
 
 import logging
 
@@ -11,19 +13,35 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket) -> str:
+        """Accept a websocket and return the token it is registered under."""
         logger.info("Connecting websocket")
         await websocket.accept()
-        self.active_connections[id(websocket)] = websocket
+        # id() values are reused once an object is freed, so key on a fresh token.
+        token = str(uuid.uuid4())
+        self.active_connections[token] = websocket
+        return token
 
-    def disconnect(self, websocket: WebSocket):
+    def disconnect(self, websocket: Union[str, WebSocket]):
+        """Remove a connection by the token from connect() or by the websocket itself."""
         logger.info("Disconnecting websocket")
-        self.active_connections.pop(id(websocket), None)
+        if isinstance(websocket, str):
+            self.active_connections.pop(websocket, None)
+            return
+        for token, connection in list(self.active_connections.items()):
+            if connection is websocket:
+                del self.active_connections[token]
+                break
 
     async def broadcast(self, message: dict):
         logger.info("Broadcasting message: %s", message)
-        for connection in self.active_connections.values():
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error("Error broadcasting message: %s", e)
+        # Snapshot the connections: a disconnect can fire while the sends are pending.
+        connections = list(self.active_connections.items())
+        results = await asyncio.gather(
+            *(connection.send_json(message) for _, connection in connections),
+            return_exceptions=True,
+        )
+        for (key, _), result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error("Error broadcasting message: %s", result)
+                self.active_connections.pop(key, None)
@@ -1,6 +1,12 @@
 # docker_interface.py
 
 import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import io
+import json
+import os
 from pathlib import Path
 import platform
 import posixpath
@@ -8,7 +14,7 @@ import tarfile
 import docker
 from docker.types import Mount, DeviceRequest
 from docker.errors import APIError, NotFound
-import tempfile
+import time
 import re
 
 from aiodocker import Docker
@@ -19,8 +25,22 @@ logger = logging.getLogger(__name__)
 # Constants used by the interface
 CONTAINER_COMFYUI_PATH = "/app/ComfyUI"
 SIGNAL_TIMEOUT = 2
-BLACKLIST_REQUIREMENTS = ["torch"]
-EXCLUDE_CUSTOM_NODE_DIRS = ["__pycache__", "ComfyUI-Manager"]
+DOCKER_MAX_POOL_SIZE = 32
+TAR_BUFFER_SIZE = 1024 * 1024
+MAX_PULL_WORKERS = 8
+PIP_OUTPUT_TAIL_LINES = 20
+# Base URLs docker-py uses for the local Unix socket and Windows named pipe.
+LOCAL_DOCKER_BASE_URLS = ("http+docker://localhost", "http+docker://localnpipe")
+REMOTE_ARCHIVE_COMPRESSLEVEL = 1
+# Two zero blocks: a valid, empty tar archive.
+EMPTY_TAR = bytes(2 * tarfile.BLOCKSIZE)
+# The host OS cannot change during the life of the process.
+IS_WINDOWS = platform.system() == "Windows"
+BLACKLIST_REQUIREMENTS = frozenset(["torch"])
+EXCLUDE_CUSTOM_NODE_DIRS = frozenset(["__pycache__", "ComfyUI-Manager"])
+_REQ_PKG_RE = re.compile(r"^\s*([a-zA-Z0-9\-_]+)")
+# Only container events affect environments; the daemon drops the rest.
+EVENT_FILTERS = {"type": ["container"]}
 
 
 class DockerInterfaceError(Exception):
@@ -55,25 +75,62 @@ class DockerInterfaceImageNotFoundError(DockerInterfaceError):
     pass
 
 
+class _ArchivePipeReader(io.RawIOBase):
+    """
+    Read end of an archive pipe that fails, rather than reaching end of file, when
+    the thread producing the archive fails, so a partial archive is never sent as
+    a complete upload.
+    """
+
+    def __init__(self, read_fd: int, producer):
+        self._pipe = os.fdopen(read_fd, "rb", buffering=0)
+        self._producer = producer
+        self.producer_error = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._pipe.readinto(buffer)
+        if not count:
+            # The write end is closed before the producer finishes, so wait for it.
+            self.producer_error = self._producer.exception()
+            if self.producer_error is not None:
+                raise self.producer_error
+        return count
+
+    def close(self):
+        self._pipe.close()
+        super().close()
+
+
 class DockerInterface:
     def __init__(self, timeout: int = 360):
         """
         Initialize the Docker client.
         """
         try:
-            self.client = docker.from_env(timeout=timeout)
+            self.client = docker.from_env(
+                timeout=timeout, max_pool_size=DOCKER_MAX_POOL_SIZE
+            )
         except docker.errors.DockerException:
             raise DockerInterfaceConnectionError(
                 "Failed to connect to Docker. Please ensure your Docker client is running."
             )
+        # Compressing archives only pays off when they travel over the network.
+        self.compress_archives = (
+            self.client.api.base_url not in LOCAL_DOCKER_BASE_URLS
+        )
 
     async def event_listener(self):
         """Async generator for Docker events"""
         async with Docker() as docker:
-            self._event_subscriber = docker.events.subscribe()
+            # Local to this generator: the interface is shared, and each listener
+            # needs its own subscription.
+            subscriber = docker.events.subscribe(filters=json.dumps(EVENT_FILTERS))
             try:
                 while True:
-                    event = await self._event_subscriber.get()
+                    event = await subscriber.get()
                     if event is None:
                         break
                     yield event
@@ -126,6 +183,31 @@ class DockerInterface:
         except APIError as e:
             raise DockerInterfaceError(str(e))
 
+    def get_container_statuses(self, container_ids: list[str]) -> dict[str, str]:
+        """
+        Retrieve the status of several containers with a single list call.
+        Containers that no longer exist are missing from the returned mapping.
+        """
+        if not container_ids:
+            return {}
+        try:
+            # sparse=True avoids an inspect call per container; the list response
+            # already carries the state.
+            containers = self.client.containers.list(
+                all=True, sparse=True, filters={"id": list(container_ids)}
+            )
+        except APIError as e:
+            raise DockerInterfaceError(str(e))
+        return {container.id: container.status for container in containers}
+
+    def _resolve_container(self, container):
+        """
+        Return a container object, looking it up only when given a container ID.
+        """
+        if isinstance(container, str):
+            return self.get_container(container)
+        return container
+
     def commit_container(self, container, repository: str, tag: str):
         """
         Commit a container to create a new image.
@@ -167,13 +249,18 @@ class DockerInterface:
         except APIError as e:
             raise DockerInterfaceError(str(e))
 
-    def start_container(self, container):
+    def start_container(self, container, assume_state: str | None = None):
         """
         Start the container if it isn't running.
+        Pass assume_state="running" when the caller already knows the container is
+        running to skip the API call entirely.
         """
+        if assume_state == "running":
+            return
         try:
-            if container.status != "running":
-                container.start()
+            # The cached container.status may be stale, and the daemon treats starting
+            # a running container as a no-op, so start directly instead of reloading.
+            container.start()
         except APIError as e:
             raise DockerInterfaceError(str(e))
 
@@ -195,12 +282,14 @@ class DockerInterface:
         except APIError as e:
             raise DockerInterfaceError(str(e))
 
-    def pull_image_api(self, image: str):
+    def pull_image_api(self, image: str, decode: bool = True):
         """
         Pull an image via the Docker API, yielding the streaming output.
+        With decode=False the raw JSON progress lines are yielded as bytes, so
+        callers that only need some of the events can skip decoding the rest.
         """
         try:
-            pull_stream = self.client.api.pull(image, stream=True, decode=True)
+            pull_stream = self.client.api.pull(image, stream=True, decode=decode)
             for line in pull_stream:
                 yield line
         except APIError as e:
@@ -225,6 +314,18 @@ class DockerInterface:
             logger.error("Error pulling image %s: %s", image, e)
             raise DockerInterfaceError(str(e))
 
+    def try_pull_images(self, images: list[str]):
+        """
+        Ensure several images exist locally, pulling missing ones concurrently.
+        """
+        if not images:
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_PULL_WORKERS, len(images))
+        ) as executor:
+            # Consume the results so the first pull error is raised here.
+            list(executor.map(self.try_pull_image, images))
+
     def run_container(
         self,
         image: str,
@@ -258,46 +359,53 @@ class DockerInterface:
 
     def copy_to_container(
         self,
-        container_id: str,
+        container,
         source_path: str,
         container_path: str,
-        exclude_dirs: list = [],
+        exclude_dirs: frozenset = frozenset(),
     ):
         """
         Copy a directory or file from the host into a container.
+        Accepts either a container object or a container ID.
         """
+        container_id = getattr(container, "id", container)
         try:
-            container = self.get_container(container_id)
-            self.ensure_directory_exists(container, container_path)
-            with tempfile.TemporaryDirectory() as temp_dir:
-                tar_path = Path(temp_dir) / "archive.tar"
-                with tarfile.open(tar_path, mode="w") as archive:
-                    for path in Path(source_path).rglob("*"):
-                        if path.is_dir() and path.name in exclude_dirs:
-                            continue
-                        relative_path = path.relative_to(source_path)
-                        archive.add(str(path), arcname=str(relative_path))
-                with open(tar_path, "rb") as tar_data:
+            container = self._resolve_container(container)
+            logger.info(
+                "Sending %s to %s:%s", source_path, container_id, container_path
+            )
+            try:
+                try:
+                    # put_archive requires the target directory to exist. Probe with
+                    # an empty archive: it is small enough that a missing directory
+                    # comes back as a clean 404, unlike a streamed upload that may
+                    # fail with a broken connection, and only then pay for the mkdir.
+                    container.put_archive(container_path, io.BytesIO(EMPTY_TAR))
+                except NotFound:
                     logger.info(
-                        "Sending %s to %s:%s", source_path, container_id, container_path
+                        "%s does not exist in %s, creating it",
+                        container_path,
+                        container_id,
                     )
-                    try:
-                        container.put_archive(container_path, tar_data)
-                        logger.info(
-                            "Copied %s to %s:%s",
-                            source_path,
-                            container_id,
-                            container_path,
-                        )
-                    except Exception as e:
-                        logger.error(
-                            "Error sending %s to %s:%s: %s",
-                            source_path,
-                            container_id,
-                            container_path,
-                            e,
-                        )
-                        raise
+                    self.ensure_directory_exists(container, container_path)
+                self._put_directory_archive(
+                    container, source_path, container_path, exclude_dirs
+                )
+                logger.info(
+                    "Copied %s to %s:%s",
+                    source_path,
+                    container_id,
+                    container_path,
+                )
+            except Exception as e:
+                logger.error(
+                    "Error sending %s to %s:%s: %s",
+                    source_path,
+                    container_id,
+                    container_path,
+                    e,
+                )
+                raise
         except docker.errors.NotFound:
             logger.error("Container %s not found.", container_id)
             raise DockerInterfaceContainerNotFoundError(
@@ -310,6 +418,65 @@ class DockerInterface:
             logger.error("An unexpected error occurred: %s", e)
             raise DockerInterfaceError(str(e))
 
+    def _put_directory_archive(
+        self, container, source_path: str, container_path: str, exclude_dirs: frozenset
+    ):
+        """
+        Stream a tar archive of source_path into the container.
+
+        The archive is written to a pipe by a producer thread while put_archive reads
+        the other end, so it is never buffered in memory or on disk as a whole.
+        """
+        read_fd, write_fd = os.pipe()
+
+        def produce():
+            with os.fdopen(write_fd, "wb") as tar_stream:
+                self._write_tar(tar_stream, source_path, exclude_dirs)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            producer = executor.submit(produce)
+            pipe_reader = _ArchivePipeReader(read_fd, producer)
+            try:
+                # Closing the read end on failure unblocks the producer with a broken
+                # pipe.
+                with io.BufferedReader(pipe_reader, TAR_BUFFER_SIZE) as tar_data:
+                    container.put_archive(container_path, tar_data)
+            except Exception:
+                # A failed archive aborts the upload mid-request; report the archive
+                # error rather than however the HTTP client wrapped it.
+                if pipe_reader.producer_error is not None:
+                    raise pipe_reader.producer_error
+                raise
+            # Re-raises any error from building the archive.
+            producer.result()
+
+    def _write_tar(self, tar_stream, source_path: str, exclude_dirs: frozenset):
+        """
+        Write the contents of source_path as a streamed tar archive to tar_stream.
+        The archive is gzip-compressed when the Docker daemon is remote.
+        """
+        with tarfile.open(
+            fileobj=tar_stream,
+            mode="w|gz" if self.compress_archives else "w|",
+            bufsize=TAR_BUFFER_SIZE,
+            copybufsize=TAR_BUFFER_SIZE,
+            compresslevel=REMOTE_ARCHIVE_COMPRESSLEVEL,
+        ) as archive:
+            exclude_dirs = frozenset(exclude_dirs)
+
+            def exclude_filter(tarinfo: tarfile.TarInfo):
+                # Returning None for a directory also skips everything below it.
+                if tarinfo.isdir() and posixpath.basename(tarinfo.name) in exclude_dirs:
+                    return None
+                return tarinfo
+
+            if not os.path.isdir(source_path):
+                archive.add(source_path, arcname=os.path.basename(source_path))
+                return
+            with os.scandir(source_path) as entries:
+                for entry in entries:
+                    archive.add(entry.path, arcname=entry.name, filter=exclude_filter)
+
     def convert_old_to_new_style(self, old_config: dict, comfyui_path: Path) -> dict:
         """
         Convert an old-style mount configuration into the new format.
@@ -330,7 +497,7 @@ class DockerInterface:
         return new_config
 
     def _process_copy_mount(
-        self, mount: dict, comfyui_path: Path, container_id: str
+        self, mount: dict, comfyui_path: Path, container
     ) -> bool:
         """
         Process a mount entry with type 'copy'.
@@ -345,15 +512,16 @@ class DockerInterface:
             return False
         source_path = Path(host_path_str)
         if not source_path.is_absolute():
-            source_path = (comfyui_path / source_path).resolve()
+            # comfyui_path is resolved by the caller, so normalising is enough here.
+            source_path = Path(os.path.normpath(comfyui_path / source_path))
         if source_path.exists():
             logger.info("Copying %s to container at %s", source_path, container_path)
             self.copy_to_container(
-                container_id, str(source_path), container_path, EXCLUDE_CUSTOM_NODE_DIRS
+                container, str(source_path), container_path, EXCLUDE_CUSTOM_NODE_DIRS
             )
             if "custom_nodes" in container_path:
                 self.install_custom_nodes(
-                    container_id, BLACKLIST_REQUIREMENTS, EXCLUDE_CUSTOM_NODE_DIRS
+                    container, BLACKLIST_REQUIREMENTS, EXCLUDE_CUSTOM_NODE_DIRS
                 )
                 return True
         else:
@@ -361,7 +529,7 @@ class DockerInterface:
         return False
 
     def _process_mount_mount(
-        self, mount: dict, comfyui_path: Path, container_id: str
+        self, mount: dict, comfyui_path: Path, container
     ) -> bool:
         """
         For backward compatibility: if a mount entry of type 'mount' points to custom_nodes,
@@ -371,119 +539,198 @@ class DockerInterface:
             "container_path", ""
         ):
             self.install_custom_nodes(
-                container_id, BLACKLIST_REQUIREMENTS, EXCLUDE_CUSTOM_NODE_DIRS
+                container, BLACKLIST_REQUIREMENTS, EXCLUDE_CUSTOM_NODE_DIRS
             )
             return True
         return False
 
     def copy_directories_to_container(
-        self, container_id: str, comfyui_path: Path, mount_config: dict
+        self, container, comfyui_path: Path, mount_config: dict
     ) -> bool:
         """
         Copy specified directories from the host to the container based on the mount configuration.
         Supports both new-style (with a "mounts" list) and old-style configurations.
+        Accepts either a container object or a container ID.
         Returns True if custom nodes were installed.
         """
+        container = self._resolve_container(container)
+        comfyui_path = comfyui_path.resolve()
         installed_custom_nodes = False
-        logger.info("copy_directories_to_container: mount_config: %s", mount_config)
+        logger.debug("copy_directories_to_container: mount_config: %s", mount_config)
         if "mounts" in mount_config and isinstance(mount_config["mounts"], list):
             config = mount_config
         else:
             logger.info("Detected old style mount config. Converting to new style.")
             config = self.convert_old_to_new_style(mount_config, comfyui_path)
-        logger.info("Using mount config: %s", config)
+        logger.debug("Using mount config: %s", config)
         for mount in config.get("mounts", []):
             action = mount.get("type", "").lower()
             if action == "copy":
-                if self._process_copy_mount(mount, comfyui_path, container_id):
+                if self._process_copy_mount(mount, comfyui_path, container):
                     if "custom_nodes" in mount.get("container_path", ""):
                         installed_custom_nodes = True
             elif action == "mount":
-                if self._process_mount_mount(mount, comfyui_path, container_id):
+                if self._process_mount_mount(mount, comfyui_path, container):
                     installed_custom_nodes = True
         return installed_custom_nodes
 
     def install_custom_nodes(
-        self, container_id: str, blacklist: list = [], exclude_dirs: list = []
+        self,
+        container,
+        blacklist: frozenset = frozenset(),
+        exclude_dirs: frozenset = frozenset(),
     ):
         """
-        Install custom nodes by checking for requirements.txt files within the custom_nodes directory
-        and running pip install for non-blacklisted dependencies.
+        Install custom nodes by collecting every requirements.txt file within the custom_nodes
+        directory in a single exec, filtering out blacklisted dependencies, and running pip
+        install for each node's filtered requirements in one more exec.
+        Accepts either a container object or a container ID.
         """
         container_custom_nodes_path = CONTAINER_COMFYUI_PATH + "/custom_nodes"
-        container = self.get_container(container_id)
-        exclude_conditions = " ".join(
-            f"-not -name '{dir_name}'" for dir_name in exclude_dirs
-        )
-        exec_command = f"sh -c 'find {container_custom_nodes_path} -mindepth 1 -maxdepth 1 -type d {exclude_conditions}'"
-        exec_id = container.exec_run(
-            exec_command, stdout=True, stderr=True, stream=True
+        container = self._resolve_container(container)
+        blacklist = frozenset(blacklist)
+        exclude_dirs = frozenset(exclude_dirs)
+        requirements_files = self._read_custom_node_requirements(
+            container, container_custom_nodes_path
         )
-        output = []
-        logger.info("Listing directories in custom_nodes path:")
-        for line in exec_id.output:
-            decoded_line = line.decode("utf-8").strip()
-            logger.info(decoded_line)
-            output.append(decoded_line)
-        output = "\n".join(output).split("\n") if output else []
-        logger.info(output)
-        for custom_node in output:
-            logger.info("Checking %s", custom_node)
-            requirements_path = posixpath.join(
-                container_custom_nodes_path, custom_node, "requirements.txt"
+        # Filtered requirements per node, keyed by path relative to custom_nodes. Each
+        # file sits next to the node's requirements.txt so pip resolves nested -r/-c
+        # and relative path lines against the node's own directory.
+        node_requirements = {}
+        for requirements_path, requirements_content in requirements_files.items():
+            custom_node = posixpath.basename(posixpath.dirname(requirements_path))
+            if custom_node in exclude_dirs:
+                logger.info("Skipping excluded custom node: %s", custom_node)
+                continue
+            logger.info(
+                "Found requirements.txt in %s, checking for blacklisted dependencies...",
+                custom_node,
             )
-            check_command = (
-                f"sh -c '[ -f {requirements_path} ] && echo exists || echo not_exists'"
+            filtered_requirements = []
+            for line in requirements_content:
+                stripped = line.strip()
+                if not stripped or stripped.startswith("#"):
+                    continue
+                match = _REQ_PKG_RE.match(line)
+                if match:
+                    package_name = match.group(1)
+                    if package_name in blacklist:
+                        logger.debug("Skipping blacklisted dependency: %s", line)
+                        continue
+                filtered_requirements.append(line)
+            if not filtered_requirements:
+                logger.info("No dependencies to install for %s", custom_node)
+                continue
+            node_requirements[posixpath.join(custom_node, "temp_requirements.txt")] = (
+                "\n".join(filtered_requirements) + "\n"
+            )
+        if not node_requirements:
+            logger.info("No custom node requirements to install.")
+            return
+        self._write_files_to_container(
+            container, container_custom_nodes_path, node_requirements
+        )
+        temp_requirements_paths = [
+            posixpath.join(container_custom_nodes_path, name) for name in node_requirements
+        ]
+        logger.info(
+            "Installing non-blacklisted dependencies for %d custom nodes...",
+            len(temp_requirements_paths),
+        )
+        # One pip run per node, so a conflicting pin in one node does not block the
+        # others, all inside a single exec. The paths are passed as arguments so they
+        # are never subject to shell quoting; the exit status is that of the last
+        # failing pip run.
+        install_command = [
+            "sh",
+            "-c",
+            'status=0; for f; do pip install -r "$f" || status=$?; rm -f "$f"; done; exit $status',
+            "sh",
+            *temp_requirements_paths,
+        ]
+        # exec_run(stream=True) never reports the exit code, so drive the exec through
+        # the low-level API and inspect it once the output stream is drained.
+        try:
+            exec_id = self.client.api.exec_create(
+                container.id, install_command, stdout=True, stderr=True
+            )["Id"]
+            output_tail = deque(maxlen=PIP_OUTPUT_TAIL_LINES)
+            for chunk in self.client.api.exec_start(exec_id, stream=True):
+                for line in chunk.decode("utf-8", errors="replace").splitlines():
+                    logger.info(line)
+                    output_tail.append(line)
+            exit_code = self.client.api.exec_inspect(exec_id)["ExitCode"]
+        except APIError as e:
+            logger.error("Error installing custom node requirements: %s", e)
+            raise DockerInterfaceError(str(e))
+        if exit_code != 0:
+            logger.error(
+                "pip install for custom node requirements exited with code %s:\n%s",
+                exit_code,
+                "\n".join(output_tail),
             )
-            check_exec_id = container.exec_run(check_command, stdout=True, stderr=True)
-            if check_exec_id.output.decode("utf-8").strip() == "exists":
-                logger.info(
-                    "Found requirements.txt in %s, checking for blacklisted dependencies...",
-                    custom_node,
-                )
-                read_command = f"sh -c 'cat {requirements_path}'"
-                read_exec_id = container.exec_run(
-                    read_command, stdout=True, stderr=True
-                )
-                requirements_content = (
-                    read_exec_id.output.decode("utf-8").strip().split("\n")
-                )
-                filtered_requirements = []
-                for line in requirements_content:
-                    match = re.match(r"^\s*([a-zA-Z0-9\-_]+)", line)
-                    if match:
-                        package_name = match.group(1)
-                        if package_name in blacklist:
-                            logger.info("Skipping blacklisted dependency: %s", line)
-                            continue
-                    filtered_requirements.append(line)
-                if filtered_requirements:
-                    temp_requirements_path = posixpath.join(
-                        container_custom_nodes_path,
-                        custom_node,
-                        "temp_requirements.txt",
-                    )
-                    create_temp_command = f"sh -c 'echo \"{chr(10).join(filtered_requirements)}\" > {temp_requirements_path}'"
-                    container.exec_run(create_temp_command, stdout=True, stderr=True)
-                    logger.info(
-                        "Installing non-blacklisted dependencies for %s...", custom_node
-                    )
-                    install_command = f"sh -c 'pip install -r {temp_requirements_path}'"
-                    install_exec_id = container.exec_run(
-                        install_command, stdout=True, stderr=True, stream=True
-                    )
-                    for line in install_exec_id.output:
-                        logger.info(line.decode("utf-8").strip())
-                    remove_temp_command = f"sh -c 'rm {temp_requirements_path}'"
-                    container.exec_run(remove_temp_command, stdout=True, stderr=True)
-            else:
-                logger.info("No requirements.txt found in %s.", custom_node)
 
-    def restart_container(self, container_id: str):
+    def _read_custom_node_requirements(
+        self, container, custom_nodes_path: str
+    ) -> dict[str, list[str]]:
+        """
+        Read every requirements.txt one level below custom_nodes_path with a single exec.
+        Returns a mapping of requirements.txt path to its lines.
+        """
+        # Each file is emitted as "<path>\0<content>\0", so paths containing newlines
+        # or marker-like text cannot break the framing.
+        exec_command = [
+            "find",
+            custom_nodes_path,
+            "-mindepth",
+            "2",
+            "-maxdepth",
+            "2",
+            "-name",
+            "requirements.txt",
+            "-exec",
+            "sh",
+            "-c",
+            'for f; do printf "%s\\0" "$f"; cat "$f"; printf "\\0"; done',
+            "sh",
+            "{}",
+            "+",
+        ]
+        exec_id = container.exec_run(exec_command, stdout=True, stderr=False)
+        fields = exec_id.output.decode("utf-8").split("\0")
+        return {
+            path: content.splitlines()
+            for path, content in zip(fields[0::2], fields[1::2])
+        }
+
+    def _write_files_to_container(
+        self, container, base_path: str, files: dict[str, str]
+    ):
         """
-        Restart the container.
+        Write small text files into a container with one in-memory tar archive.
+        files maps paths relative to base_path, which must already exist, to contents.
+        """
+        tar_buffer = io.BytesIO()
+        mtime = int(time.time())
+        with tarfile.open(fileobj=tar_buffer, mode="w") as archive:
+            for name, content in files.items():
+                data = content.encode("utf-8")
+                tarinfo = tarfile.TarInfo(name=name)
+                tarinfo.size = len(data)
+                tarinfo.mtime = mtime
+                tarinfo.mode = 0o644
+                archive.addfile(tarinfo, io.BytesIO(data))
+        try:
+            container.put_archive(base_path, tar_buffer.getvalue())
+        except APIError as e:
+            logger.error("Error writing files in %s in container: %s", base_path, e)
+            raise DockerInterfaceError(str(e))
+
+    def restart_container(self, container):
+        """
+        Restart the container. Accepts either a container object or a container ID.
         """
-        container = self.get_container(container_id)
+        container = self._resolve_container(container)
         try:
             container.restart(timeout=SIGNAL_TIMEOUT)
         except APIError as e:
@@ -497,7 +744,7 @@ class DockerInterface:
         mounts = []
         user_mounts = mount_config.get("mounts", [])
         for m in user_mounts:
-            logger.info("Mount: %s", m)
+            logger.debug("Mount: %s", m)
             action = m.get("type", "").lower()
             if action not in ["mount", "copy"]:
                 logger.info(
@@ -515,20 +762,20 @@ class DockerInterface:
                 )
                 continue
             source_path = Path(host_path)
-            logger.info("source_path: %s", source_path)
+            logger.debug("source_path: %s", source_path)
             if not source_path.is_absolute():
                 source_path = comfyui_path / source_path
-                logger.info("source_path: %s", source_path)
+                logger.debug("source_path: %s", source_path)
             if not source_path.exists():
                 logger.info(
                     "Host directory does not exist: %s. Creating directory.",
                     source_path,
                 )
                 source_path.mkdir(parents=True, exist_ok=True)
-            source_str = str(source_path.resolve())
-            logger.info("source_str: %s", source_str)
-            target_str = str(Path(container_path).as_posix())
-            logger.info("target_str: %s", target_str)
+            source_str = os.path.normpath(source_path)
+            logger.debug("source_str: %s", source_str)
+            target_str = posixpath.normpath(container_path.replace("\\", "/"))
+            logger.debug("target_str: %s", target_str)
             read_only = m.get("read_only", False)
             logger.info(
                 "Mounting host '%s' to container '%s' (read_only=%s)",
@@ -546,7 +793,7 @@ class DockerInterface:
             )
 
         # Check if on windows
-        if platform.system() == "Windows":
+        if IS_WINDOWS:
             logger.info("Adding /usr/lib/wsl mount")
             mounts.append(
                 Mount(
@@ -562,8 +809,20 @@ class DockerInterface:
         """
         Main function to create mounts. Supports both new-style and old-style configurations.
         """
+        # Resolve once; relative host paths are then joined and normalised without
+        # touching the filesystem again.
+        comfyui_path = comfyui_path.resolve()
         config = mount_config
         if "mounts" not in config or not isinstance(config["mounts"], list):
             logger.info("Detected old style mount config. Converting to new style.")
             config = self.convert_old_to_new_style(mount_config, comfyui_path)
         return self._create_mounts_from_new_config(config, comfyui_path)
+
+
+@functools.lru_cache(maxsize=1)
+def get_docker_interface() -> DockerInterface:
+    """
+    Return the process-wide DockerInterface, connecting on first use.
+    The underlying docker-py client is safe to share between threads.
+    """
+    return DockerInterface()
@@ -1,15 +1,27 @@
 # environment.py
 
 import asyncio
+import functools
+import heapq
+import itertools
+import os
+import threading
 import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import from_json
 from docker.types import DeviceRequest, Mount
-from .docker_interface import DockerInterface, DockerInterfaceContainerNotFoundError
+from .docker_interface import (
+    DockerInterface,
+    DockerInterfaceContainerNotFoundError,
+    get_docker_interface,
+)
 from .persistence import (
-    save_environments as persistence_save_environments,
-    load_environments as persistence_load_environments,
+    save_environments_json as persistence_save_environments_json,
+    load_environments_json as persistence_load_environments_json,
     PersistenceError,
 )
 from dataclasses import dataclass
@@ -23,8 +35,31 @@ logger = logging.getLogger(__name__)
 DB_FILE = "environments.json"
 DEFAULT_LOCK_FILE = f"{DB_FILE}.lock"
 DELETED_FOLDER_ID = "deleted"
+STATUS_CACHE_TTL = 1.0  # seconds
+# Upper bound while Docker events keep the cache up to date, for changes that
+# arrive as no event this manager maps to a status. Monitoring counts as started
+# before aiodocker's event stream has connected, so a status fetched in that window
+# can miss an event fired before the connection and stay stale for up to this long.
+MONITORED_STATUS_CACHE_TTL = 60.0  # seconds
+# Container status after each Docker event action that changes it; None means
+# the container no longer exists.
+EVENT_ACTION_STATUSES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "stop": "exited",
+    "die": "exited",
+    "destroy": None,
+}
+# Container statuses in which there is nothing left to stop.
+STOPPED_STATUSES = frozenset({"stopped", "exited", "created", "dead"})
 SIGNAL_TIMEOUT = 0  # seconds
+# Container events within this window are announced with a single broadcast.
+NOTIFY_DEBOUNCE = 0.1  # seconds
 COMFYUI_PORT = 8188
+MAX_DOCKER_WORKERS = 8
 
 
 class Environment(BaseModel):
@@ -41,6 +76,10 @@ class Environment(BaseModel):
     folderIds: List[str] = []
 
 
+# Serializes and parses a whole environment list in one pydantic-core call.
+_ENVIRONMENT_LIST_ADAPTER = TypeAdapter(List[Environment])
+
+
 class EnvironmentUpdate(BaseModel):
     name: Optional[str] = None
     folderIds: Optional[List[str]] = None
@@ -56,64 +95,221 @@ class _ContainerConfig:
     entrypoint: list[str] | str | None
 
 
+@dataclass
+class _PendingChange:
+    created: List[Environment]
+    updated: List[Environment]
+    removed_ids: set[str]
+    done: bool = False
+    error: Exception | None = None
+
+
 class EnvironmentManager:
-    def __init__(self, db_file: str = DB_FILE, lock_file: str = DEFAULT_LOCK_FILE):
+    def __init__(
+        self,
+        db_file: str = DB_FILE,
+        lock_file: str = DEFAULT_LOCK_FILE,
+        status_cache_ttl: float = STATUS_CACHE_TTL,
+    ):
         self.db_file = db_file
         self.lock_file = lock_file
-        self.docker_iface = DockerInterface()
+        self.status_cache_ttl = status_cache_ttl
         self.ws_manager = None
+        self._notify_task: Optional[asyncio.Task] = None
+        self._status_cache: tuple[float, frozenset[str], dict[str, str]] | None = None
+        # While Docker events are being monitored they keep the cache up to date, so
+        # it expires after MONITORED_STATUS_CACHE_TTL instead.
+        self._status_events_monitored = False
+        # Changes on every container event and invalidation, so a fetch that raced
+        # with either is not cached.
+        self._status_generations = itertools.count(1)
+        self._status_generation = 0
+        # Per-environment locks serialise operations on the same environment, while
+        # the database lock is only held to merge and write changes.
+        self._env_locks: weakref.WeakValueDictionary[str, threading.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        self._env_locks_guard = threading.Lock()
+        self._db_lock = threading.Lock()
+        # Changes waiting for the next write, guarded by _pending_guard.
+        self._pending_changes: list[_PendingChange] = []
+        self._pending_guard = threading.Lock()
+        # Serialized load_environments_json results by folder_id, each stored with the
+        # _environments_json_key it was built under.
+        self._environments_json_cache: dict[Optional[str], tuple[tuple, bytes]] = {}
+        # Changes on every save by this manager, in case the file's mtime does not.
+        self._db_versions = itertools.count(1)
+        self._db_version = 0
         logger.info(
             "Initialized EnvironmentManager with db_file: %s and lock_file: %s",
             self.db_file,
             self.lock_file,
         )
             
+    @functools.cached_property
+    def docker_iface(self) -> DockerInterface:
+        # Connect lazily and share one client across managers.
+        return get_docker_interface()
+
     # ────────────────────────────────────
     # private helpers
     # ────────────────────────────────────
 
-    def _validate_environments_list(self, environments: List[Environment]) -> None:
-        logger.debug(
-            "Validating environments list with %d environments", len(environments)
-        )
-
-        if not all(isinstance(env, Environment) for env in environments):
-            logger.error("Validation failed: Not all items are Environment instances")
-            raise ValueError("All environments must be Environment instances.")
-
     def _save_environments(self, environments: List[Environment]) -> None:
-        self._validate_environments_list(environments)
         try:
-            envs_list = [env.model_dump() for env in environments]
-            logger.info(
+            json_bytes = _ENVIRONMENT_LIST_ADAPTER.dump_json(environments, indent=4)
+            logger.debug(
                 "Saving %d environments to file %s", len(environments), self.db_file
             )
-            persistence_save_environments(envs_list, self.db_file, self.lock_file)
+            persistence_save_environments_json(json_bytes, self.db_file, self.lock_file)
+            self._db_version = next(self._db_versions)
             logger.debug("Successfully saved environments")
         except PersistenceError as e:
             logger.error("Error saving environments: %s", e)
             raise RuntimeError(f"Error saving environments: {e}")
 
-    def _update_environment(
-        self, new_env: Environment, environments: List[Environment]
+    def _load_raw(self) -> List[Environment]:
+        """
+        Load the stored environments without refreshing their container status.
+        """
+        try:
+            raw_envs = persistence_load_environments_json(self.db_file, self.lock_file)
+            return _ENVIRONMENT_LIST_ADAPTER.validate_json(raw_envs)
+        except (PersistenceError, ValidationError) as e:
+            logger.error("Error loading environments: %s", e)
+            raise RuntimeError(f"Error loading environments: {e}")
+
+    def _env_lock(self, env_id: str) -> threading.Lock:
+        with self._env_locks_guard:
+            lock = self._env_locks.get(env_id)
+            if lock is None:
+                lock = threading.Lock()
+                self._env_locks[env_id] = lock
+            return lock
+
+    def _store_changes(
+        self,
+        created: List[Environment] = (),
+        updated: List[Environment] = (),
+        removed_ids: set[str] = frozenset(),
     ) -> None:
-        self._validate_environments_list(environments)
-        logger.debug("Updating environment with id: %s", new_env.id)
-        for i, env in enumerate(environments):
-            if env.id == new_env.id:
-                environments[i] = new_env
-                logger.debug("Updated environment with id: %s", new_env.id)
-                return
-        logger.error("Environment with id %s not found in list", new_env.id)
-        raise ValueError("Environment not found in list")
-
-    def _remove_environment(
-        self, env: Environment, environments: List[Environment]
+        """
+        Merge created, changed and removed environments into the latest stored list
+        and save it, so concurrent operations on other environments are not
+        overwritten. Changes to environments that are no longer stored, for example
+        because a concurrent prune removed them, are dropped.
+
+        Changes queued by other threads while a save is in progress are written
+        together by the next save, so a burst of mutations costs one file write.
+        """
+        change = _PendingChange(list(created), list(updated), set(removed_ids))
+        with self._pending_guard:
+            self._pending_changes.append(change)
+        with self._db_lock:
+            if not change.done:
+                self._write_pending_changes()
+        if change.error is not None:
+            raise change.error
+
+    def _write_pending_changes(self) -> None:
+        """Apply every queued change to the stored list in one save. Needs _db_lock."""
+        with self._pending_guard:
+            batch, self._pending_changes = self._pending_changes, []
+        try:
+            # Dicts keep insertion order, so existing environments keep their place
+            # and new ones are appended.
+            environments = {env.id: env for env in self._load_raw()}
+            changed = False
+            for change in batch:
+                for env_id in change.removed_ids:
+                    changed |= environments.pop(env_id, None) is not None
+                for env in change.created:
+                    changed |= environments.get(env.id) != env
+                    environments[env.id] = env
+                for env in change.updated:
+                    if env.id not in environments:
+                        logger.debug("Environment %s was removed, dropping update", env.id)
+                        continue
+                    changed |= environments[env.id] != env
+                    environments[env.id] = env
+            if changed:
+                self._save_environments(list(environments.values()))
+            else:
+                logger.debug("No environments changed, skipping save")
+        except Exception as e:
+            for change in batch:
+                change.error = e
+        finally:
+            for change in batch:
+                change.done = True
+
+    def _remove_environments(
+        self, env_ids: set[str], environments: List[Environment]
     ) -> None:
-        self._validate_environments_list(environments)
-        logger.debug("Removing environment with id: %s", env.id)
-        environments[:] = [e for e in environments if e.id != env.id]
-        logger.debug("Environment with id %s removed", env.id)
+        logger.debug("Removing environments with ids: %s", env_ids)
+        environments[:] = [e for e in environments if e.id not in env_ids]
+        logger.debug("Environments with ids %s removed", env_ids)
+
+    def _get_container_statuses(self, env_ids: List[str]) -> dict[str, str]:
+        """
+        Fetch container statuses for all environments with one Docker call, reusing
+        the previous result for status_cache_ttl seconds, or for up to
+        MONITORED_STATUS_CACHE_TTL seconds while Docker events keep it up to date.
+        """
+        env_ids = frozenset(env_ids)
+        now = time.monotonic()
+        if self._status_cache is not None:
+            fetched_at, cached_ids, statuses = self._status_cache
+            if self._status_cache_fresh(fetched_at, now) and env_ids <= cached_ids:
+                return statuses
+        generation = self._status_generation
+        statuses = self.docker_iface.get_container_statuses(list(env_ids))
+        # An event or invalidation during the fetch may postdate this snapshot.
+        if generation == self._status_generation:
+            self._status_cache = (now, env_ids, statuses)
+        return statuses
+
+    def _status_cache_fresh(self, fetched_at: float, now: float) -> bool:
+        if self._status_events_monitored:
+            return now - fetched_at < MONITORED_STATUS_CACHE_TTL
+        return now - fetched_at < self.status_cache_ttl
+
+    def _cached_status(self, env_id: str) -> Optional[str]:
+        """
+        Return the cached container status of an environment without calling Docker,
+        or None if it is not cached or the cache has expired.
+        """
+        cache = self._status_cache
+        if cache is None:
+            return None
+        fetched_at, _, statuses = cache
+        if not self._status_cache_fresh(fetched_at, time.monotonic()):
+            return None
+        return statuses.get(env_id)
+
+    def _invalidate_status_cache(self) -> None:
+        self._status_generation = next(self._status_generations)
+        self._status_cache = None
+
+    def _apply_status_event(self, container_id: str, action: str) -> None:
+        """
+        Update the cached status of a container from a Docker event instead of
+        refetching every status.
+        """
+        # Even when nothing is cached, a fetch in flight may predate this event.
+        self._status_generation = next(self._status_generations)
+        cache = self._status_cache
+        if cache is None or container_id not in cache[1]:
+            return
+        fetched_at, env_ids, statuses = cache
+        # Copy on write so concurrent readers keep a consistent snapshot.
+        statuses = dict(statuses)
+        status = EVENT_ACTION_STATUSES[action]
+        if status is None:
+            statuses.pop(container_id, None)
+        else:
+            statuses[container_id] = status
+        self._status_cache = (fetched_at, env_ids, statuses)
 
     def _find_environment(
         self, env_id: str, environments: List[Environment]
@@ -174,24 +370,52 @@ class EnvironmentManager:
         logger.info(
             "Stopping other running environments excluding id: %s", current_env_id
         )
-        for env in environments:
-            if env.id != current_env_id and env.status == "running":
-                logger.debug("Stopping environment with id: %s", env.id)
-                try:
-                    container = self.docker_iface.get_container(env.id)
-                    self.docker_iface.stop_container(container)
-                    logger.info("Stopped environment with id: %s", env.id)
-                except DockerInterfaceContainerNotFoundError:
-                    logger.warning(
-                        "Container for environment %s not found during stop operation",
-                        env.id,
-                    )
-                    continue
+        targets = [
+            env
+            for env in environments
+            if env.id != current_env_id and env.status == "running"
+        ]
+        self._run_concurrently(self._stop_environment, targets)
+
+    def _stop_environment(self, env: Environment) -> None:
+        logger.debug("Stopping environment with id: %s", env.id)
+        try:
+            container = self.docker_iface.get_container(env.id)
+            self.docker_iface.stop_container(container)
+            self._invalidate_status_cache()
+            logger.info("Stopped environment with id: %s", env.id)
+        except DockerInterfaceContainerNotFoundError:
+            logger.warning(
+                "Container for environment %s not found during stop operation",
+                env.id,
+            )
+
+    def _run_concurrently(self, fn, environments: List[Environment]) -> None:
+        """
+        Run a blocking Docker operation for each environment in parallel, so waiting
+        on several containers takes as long as the slowest one rather than the sum.
+        Re-raises the first error after all operations have finished.
+        """
+        if len(environments) <= 1:
+            for env in environments:
+                fn(env)
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(len(environments), MAX_DOCKER_WORKERS)
+        ) as executor:
+            futures = [executor.submit(fn, env) for env in environments]
+        for future in futures:
+            future.result()
                 
     def _hard_delete_environment(
         self, env: Environment, environments: List[Environment]
     ) -> None:
         logger.info("Hard deleting environment with id: %s", env.id)
+        self._remove_environment_resources(env)
+        self._remove_environments({env.id}, environments)
+        logger.info("Environment %s removed from environment list", env.id)
+
+    def _remove_environment_resources(self, env: Environment) -> None:
         try:
             container = self.docker_iface.get_container(env.id)
             logger.debug(
@@ -202,6 +426,7 @@ class EnvironmentManager:
             self.docker_iface.stop_container(container, timeout=SIGNAL_TIMEOUT)
             logger.debug("Removing container for environment %s", env.id)
             self.docker_iface.remove_container(container)
+            self._invalidate_status_cache()
             logger.info("Container for environment %s removed", env.id)
         except DockerInterfaceContainerNotFoundError:
             logger.warning(
@@ -216,9 +441,6 @@ class EnvironmentManager:
             except Exception as e:
                 logger.warning("Failed to remove duplicate image %s: %s", env.image, e)
 
-        self._remove_environment(env, environments)
-        logger.info("Environment %s removed from environment list", env.id)
-
     def _prune_deleted_environments(
         self, environments: List[Environment], max_deleted: int
     ) -> None:
@@ -234,18 +456,16 @@ class EnvironmentManager:
             logger.debug("No pruning needed, count is within limit")
             return
 
-        deleted_envs.sort(key=lambda e: e.metadata.get("deleted_at", 0))
         num_to_prune = len(deleted_envs) - max_deleted
         logger.info("Pruning %d environments", num_to_prune)
-        for env in deleted_envs[:num_to_prune]:
-            logger.debug("Hard deleting environment during prune: %s", env.id)
-            self._hard_delete_environment(env, environments)
+        # Only the oldest few are needed, so avoid sorting the whole deleted set.
+        oldest_envs = heapq.nsmallest(
+            num_to_prune, deleted_envs, key=lambda e: e.metadata.get("deleted_at", 0)
+        )
+        self._run_concurrently(self._remove_environment_resources, oldest_envs)
+        # Drop every pruned environment in a single pass over the list.
+        self._remove_environments({env.id for env in oldest_envs}, environments)
             
-    def _save_environment(self, env: Environment) -> None:
-        environments = self.load_environments()
-        environments.append(env)
-        self._save_environments(environments)
-        
     def _provision_container(
         self,
         env: Environment,
@@ -253,11 +473,13 @@ class EnvironmentManager:
         base_image: str,
         duplicate: bool = False,
         original: Environment | None = None,
+        cfg: _ContainerConfig | None = None,
     ) -> Environment:
         """
         Common logic for any path that ends with 'docker_iface.create_container'.
         """
-        cfg = self._create_container_config(env)
+        if cfg is None:
+            cfg = self._create_container_config(env)
         
         env.container_name = self._generate_container_name()
         try:
@@ -274,6 +496,7 @@ class EnvironmentManager:
         except Exception as exc:
             raise RuntimeError(f"Error creating container: {exc}") from exc
 
+        self._invalidate_status_cache()
         env.id = container.id
         env.image = base_image
         env.status = "created"
@@ -284,7 +507,7 @@ class EnvironmentManager:
             else {"base_image": base_image, "created_at": time.time()}
         )
 
-        self._save_environment(env)          # tiny helper, appends + saves
+        self._store_changes(created=[env])
         return env
     
     def _ensure_local_image(self, image: str) -> None:
@@ -316,55 +539,80 @@ class EnvironmentManager:
     async def monitor_docker_events(self):
         """Non-blocking Docker event monitoring"""
         logger.info("Starting Docker event monitoring")
+        self._invalidate_status_cache()
+        self._status_events_monitored = True
         try:
             async for event in self.docker_iface.event_listener():
                 logger.debug("Docker event: %s", event)
                 if event.get("Type") == "container":
                     action = event.get("Action")
+                    if action in EVENT_ACTION_STATUSES:
+                        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+                        self._apply_status_event(container_id, action)
                     if action in ["start", "stop", "create", "destroy"]:
-                        await self.notify_update()
+                        self._schedule_notify_update()
         except asyncio.CancelledError:
             logger.info("Docker event monitoring stopped")
         except Exception as e:
             logger.error("Error in Docker event monitoring: %s", e)
+        finally:
+            # Without events the cache can no longer be trusted past its TTL.
+            self._status_events_monitored = False
+            if self._notify_task is not None:
+                self._notify_task.cancel()
+                self._notify_task = None
+
+    def _schedule_notify_update(self) -> None:
+        """
+        Broadcast an update shortly, unless one is already pending, so a burst of
+        container events results in one broadcast.
+        """
+        if self._notify_task is None:
+            self._notify_task = asyncio.create_task(self._notify_update_later())
+
+    async def _notify_update_later(self):
+        await asyncio.sleep(NOTIFY_DEBOUNCE)
+        # Events from here on schedule the next broadcast.
+        self._notify_task = None
+        try:
+            await self.notify_update()
+        except Exception as e:
+            logger.error("Error notifying WebSocket manager: %s", e)
     
     def get_environment(self, env_id: str) -> Environment:
-        logger.info("Getting environment with id: %s", env_id)
+        logger.debug("Getting environment with id: %s", env_id)
         environments = self.load_environments()
         return self._find_environment(env_id, environments)
 
     def load_environments(self, folder_id: Optional[str] = None) -> List[Environment]:
-        logger.info("Loading environments from file: %s", self.db_file)
-        try:
-            raw_envs = persistence_load_environments(self.db_file, self.lock_file)
-            # logger.debug("Loaded raw environments: %s", raw_envs)
-        except PersistenceError as e:
-            logger.error("Error loading environments: %s", e)
-            raise RuntimeError(f"Error loading environments: {e}")
+        """
+        Load environments with their current container status.
+        Statuses are recomputed from Docker on every load, so they are not written
+        back to the database.
+        """
+        logger.debug("Loading environments from file: %s", self.db_file)
+        environments = self._load_raw()
 
-        environments = [Environment(**env) for env in raw_envs]
         logger.debug("Converted raw environments to Environment instances")
 
-        for env in environments:
-            # logger.debug("Updating container status for environment id: %s", env.id)
-            try:
-                container = self.docker_iface.get_container(env.id)
-                env.status = container.status
-                # logger.debug("Container status for environment %s: %s", env.id, container.status)
-            except DockerInterfaceContainerNotFoundError:
+        # A dead container never comes back, so there is no need to ask Docker again.
+        live_envs = [env for env in environments if env.status != "dead"]
+        try:
+            statuses = self._get_container_statuses([env.id for env in live_envs])
+        except Exception as e:
+            logger.error("Error updating container statuses: %s", e)
+            raise RuntimeError(f"Error updating container status: {e}")
+
+        for env in live_envs:
+            status = statuses.get(env.id)
+            if status is None:
                 env.status = "dead"
                 logger.warning(
                     "Container for environment %s not found, setting status to 'dead'",
                     env.id,
                 )
-            except Exception as e:
-                logger.error(
-                    "Error updating container status for environment %s: %s", env.id, e
-                )
-                raise RuntimeError(f"Error updating container status: {e}")
-
-        self._save_environments(environments)
-        logger.info("Environments saved after status update")
+            else:
+                env.status = status
 
         if folder_id:
             logger.debug("Filtering environments by folder_id: %s", folder_id)
@@ -381,9 +629,67 @@ class EnvironmentManager:
                 "Returning %d environments after filtering", len(filtered_envs)
             )
             return filtered_envs
-        logger.info("Returning %d environments", len(environments))
+        logger.debug("Returning %d environments", len(environments))
         return environments
 
+    def load_environments_json(self, folder_id: Optional[str] = None) -> bytes:
+        """
+        Load environments like load_environments and return them as JSON bytes, ready
+        to be written to a response without another serialization pass.
+
+        The bytes are reused until the database file or the cached container statuses
+        change, so repeated polling neither parses nor serializes the list again.
+        """
+        key = self._environments_json_key()
+        if key is not None:
+            cached = self._environments_json_cache.get(folder_id)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        json_bytes = _ENVIRONMENT_LIST_ADAPTER.dump_json(self.load_environments(folder_id))
+        # Only keep the result if nothing changed while it was being built.
+        if key is not None and key == self._environments_json_key():
+            self._environments_json_cache[folder_id] = (key, json_bytes)
+        return json_bytes
+
+    def _environments_json_key(self) -> Optional[tuple]:
+        """
+        Identify the inputs of load_environments_json: the database file, this
+        manager's writes and the container statuses. None if the statuses have
+        expired and must be fetched again.
+        """
+        status_cache = self._status_cache
+        if status_cache is None or not self._status_cache_fresh(
+            status_cache[0], time.monotonic()
+        ):
+            return None
+        try:
+            file_stat = os.stat(self.db_file)
+            file_key = (file_stat.st_mtime_ns, file_stat.st_size)
+        except FileNotFoundError:
+            file_key = None
+        return (file_key, self._db_version, status_cache)
+
+    def get_environment_statuses(self) -> dict[str, str]:
+        """
+        Return the current container status of every environment keyed by id, without
+        building Environment models.
+        """
+        try:
+            raw_envs = persistence_load_environments_json(self.db_file, self.lock_file)
+            envs = from_json(raw_envs)
+            env_ids = [env["id"] for env in envs]
+            live_ids = [env["id"] for env in envs if env.get("status") != "dead"]
+        except (PersistenceError, ValueError, KeyError, TypeError) as e:
+            logger.error("Error loading environments: %s", e)
+            raise RuntimeError(f"Error loading environments: {e}")
+        try:
+            statuses = self._get_container_statuses(live_ids)
+        except Exception as e:
+            logger.error("Error updating container statuses: %s", e)
+            raise RuntimeError(f"Error updating container status: {e}")
+        return {env_id: statuses.get(env_id, "dead") for env_id in env_ids}
+
     def check_environment_name(
         self, env: Environment, environments: List[Environment]
     ) -> None:
@@ -397,106 +703,169 @@ class EnvironmentManager:
         return self._provision_container(env, base_image=env.image)
     
     def duplicate_environment(self, env_id: str, new_env: Environment) -> Environment:
-        original = self._find_environment(env_id, self.load_environments())
-        if original.status == "created":
+        original = self._find_environment(env_id, self._load_raw())
+        container = self.docker_iface.get_container(env_id)
+        if container.status == "created":
             raise RuntimeError("Environment can only be duplicated after activation")
 
-        # 1. commit the original container into a new image
+        # 1. commit the original container into a new image, building the new
+        #    container's config while Docker snapshots the layers
         unique_image = f"comfy-env-clone:{self._generate_container_name()}"
-        self.docker_iface.commit_container(
-            self.docker_iface.get_container(env_id), *unique_image.split(":")
-        )
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            commit = executor.submit(
+                self.docker_iface.commit_container, container, *unique_image.split(":")
+            )
+            cfg = self._create_container_config(new_env)
+            commit.result()
 
         # 2. spin up a container from that image
-        return self._provision_container(new_env, base_image=unique_image, duplicate=True, original=original)
+        return self._provision_container(
+            new_env, base_image=unique_image, duplicate=True, original=original, cfg=cfg
+        )
 
     def update_environment(self, env_id: str, update: EnvironmentUpdate) -> Environment:
         logger.info("Updating environment with id: %s", env_id)
-        environments = self.load_environments()
-        env = self._find_environment(env_id, environments)
-
-        if update.name is not None:
-            logger.debug("Updating name for environment %s to %s", env_id, update.name)
-            env.name = update.name
-            if not env.container_name:
-                env.container_name = env.name
-                logger.debug("Container name not set, using name: %s", env.name)
-
-        if update.folderIds is not None:
-            logger.debug(
-                "Updating folderIds for environment %s to %s", env_id, update.folderIds
-            )
-            env.folderIds = update.folderIds
-
-        self._update_environment(env, environments)
-        self._save_environments(environments)
-        logger.info("Environment %s updated successfully", env_id)
-        return env
+        with self._env_lock(env_id):
+            # Only stored fields change, so skip the container status refresh.
+            environments = self._load_raw()
+            env = self._find_environment(env_id, environments)
+
+            changes = update.model_dump(exclude_none=True)
+            logger.debug("Updating environment %s with %s", env_id, changes)
+            if "name" in changes and not env.container_name:
+                changes["container_name"] = changes["name"]
+                logger.debug("Container name not set, using name: %s", changes["name"])
+            env = env.model_copy(update=changes)
+
+            self._store_changes(updated=[env])
+            logger.info("Environment %s updated successfully", env_id)
+            return env
 
     def activate_environment(
         self, env_id: str, allow_multiple: bool = False
     ) -> Environment:
         logger.info("Activating environment with id: %s", env_id)
-        environments = self.load_environments()
-        env = self._find_environment(env_id, environments)
-        container = self.docker_iface.get_container(env.id)
-
-        if not allow_multiple:
-            self._stop_other_environments(env_id, environments)
-
-        logger.info("Starting container for environment %s", env.id)
-        self.docker_iface.start_container(container)
-
-        if env.status == "created":
-            logger.info("Copying directories to container for environment %s", env.id)
-            logger.debug("env: %s", env)
-            comfyui_path = Path(env.comfyui_path)
-            mount_config = env.options.get("mount_config", {})
-            custom_nodes_installed = self.docker_iface.copy_directories_to_container(
-                container.id, comfyui_path, mount_config
+        with self._env_lock(env_id):
+            environments = self.load_environments()
+            env = self._find_environment(env_id, environments)
+            container = self.docker_iface.get_container(env.id)
+
+            if not allow_multiple:
+                self._stop_other_environments(env_id, environments)
+
+            logger.info("Starting container for environment %s", env.id)
+            # A container the status cache knows to be running is not started again.
+            self.docker_iface.start_container(
+                container, assume_state=self._cached_status(env.id)
             )
-            if custom_nodes_installed:
-                logger.info("Custom nodes installed for environment %s", env.id)
-                logger.info("Restarting container for environment %s", env.id)
-                self.docker_iface.restart_container(container)
-
-        env.status = "running"
-        self._update_environment(env, environments)
-        self._save_environments(environments)
-        logger.info("Environment %s activated and running", env.id)
-        return env
+            self._invalidate_status_cache()
+
+            if env.status == "created":
+                logger.info("Copying directories to container for environment %s", env.id)
+                logger.debug("env: %s", env)
+                comfyui_path = Path(env.comfyui_path)
+                mount_config = env.options.get("mount_config", {})
+                custom_nodes_installed = self.docker_iface.copy_directories_to_container(
+                    container, comfyui_path, mount_config
+                )
+                if custom_nodes_installed:
+                    logger.info("Custom nodes installed for environment %s", env.id)
+                    logger.info("Restarting container for environment %s", env.id)
+                    self.docker_iface.restart_container(container)
+
+            env.status = "running"
+            self._store_changes(updated=[env])
+            logger.info("Environment %s activated and running", env.id)
+            return env
 
     def deactivate_environment(self, env_id: str) -> Environment:
         logger.info("Deactivating environment with id: %s", env_id)
-        environments = self.load_environments()
-        env = self._find_environment(env_id, environments)
-        container = self.docker_iface.get_container(env.id)
+        with self._env_lock(env_id):
+            env = self._find_environment(env_id, self._load_raw())
+            cached_status = self._cached_status(env.id)
+            if cached_status in STOPPED_STATUSES:
+                logger.debug("Environment %s is already %s", env.id, cached_status)
+                env.status = cached_status
+                return env
 
-        if container.status not in ("stopped", "exited", "created", "dead"):
-            logger.info("Stopping container for environment %s", env.id)
-            self.docker_iface.stop_container(container, timeout=SIGNAL_TIMEOUT)
-            env.status = "stopped"
-            self._update_environment(env, environments)
-            self._save_environments(environments)
-            logger.info("Environment %s deactivated", env.id)
-        return env
+            container = self.docker_iface.get_container(env.id)
+            env.status = container.status
+
+            if container.status not in STOPPED_STATUSES:
+                logger.info("Stopping container for environment %s", env.id)
+                self.docker_iface.stop_container(container, timeout=SIGNAL_TIMEOUT)
+                self._invalidate_status_cache()
+                env.status = "stopped"
+                self._store_changes(updated=[env])
+                logger.info("Environment %s deactivated", env.id)
+            return env
 
     def delete_environment(self, env_id: str, max_deleted: int = 10) -> str:
         logger.info("Deleting environment with id: %s", env_id)
-        environments = self.load_environments()
-        env = self._find_environment(env_id, environments)
-
-        if DELETED_FOLDER_ID in env.folderIds:
-            logger.info(
-                "Environment %s marked as deleted, proceeding with hard delete", env.id
+        with self._env_lock(env_id):
+            # Deleting and pruning only need stored fields, not container statuses.
+            environments = self._load_raw()
+            env_ids = {e.id for e in environments}
+            env = self._find_environment(env_id, environments)
+
+            if DELETED_FOLDER_ID in env.folderIds:
+                logger.info(
+                    "Environment %s marked as deleted, proceeding with hard delete", env.id
+                )
+                self._hard_delete_environment(env, environments)
+            else:
+                logger.info("Marking environment %s as deleted", env.id)
+                env.folderIds = [DELETED_FOLDER_ID]
+                env.metadata["deleted_at"] = time.time()
+                self._prune_deleted_environments(environments, max_deleted)
+
+            remaining_ids = {e.id for e in environments}
+            self._store_changes(
+                updated=[env] if env.id in remaining_ids else [],
+                removed_ids=env_ids - remaining_ids,
             )
-            self._hard_delete_environment(env, environments)
-        else:
-            logger.info("Marking environment %s as deleted", env.id)
-            env.folderIds = [DELETED_FOLDER_ID]
-            env.metadata["deleted_at"] = time.time()
-            self._prune_deleted_environments(environments, max_deleted)
-
-        self._save_environments(environments)
-        logger.info("Environment %s deletion process completed", env_id)
-        return env_id
+            logger.info("Environment %s deletion process completed", env_id)
+            return env_id
+
+    # ────────────────────────────────────
+    # async wrappers
+    # ────────────────────────────────────
+    # Docker calls and file locking block, so async callers (e.g. FastAPI
+    # handlers) run the sync methods in a worker thread instead of stalling
+    # the event loop.
+
+    async def get_environment_async(self, env_id: str) -> Environment:
+        return await asyncio.to_thread(self.get_environment, env_id)
+
+    async def load_environments_async(
+        self, folder_id: Optional[str] = None
+    ) -> List[Environment]:
+        return await asyncio.to_thread(self.load_environments, folder_id)
+
+    async def create_environment_async(self, env: Environment) -> Environment:
+        return await asyncio.to_thread(self.create_environment, env)
+
+    async def duplicate_environment_async(
+        self, env_id: str, new_env: Environment
+    ) -> Environment:
+        return await asyncio.to_thread(self.duplicate_environment, env_id, new_env)
+
+    async def update_environment_async(
+        self, env_id: str, update: EnvironmentUpdate
+    ) -> Environment:
+        return await asyncio.to_thread(self.update_environment, env_id, update)
+
+    async def activate_environment_async(
+        self, env_id: str, allow_multiple: bool = False
+    ) -> Environment:
+        return await asyncio.to_thread(
+            self.activate_environment, env_id, allow_multiple
+        )
+
+    async def deactivate_environment_async(self, env_id: str) -> Environment:
+        return await asyncio.to_thread(self.deactivate_environment, env_id)
+
+    async def delete_environment_async(
+        self, env_id: str, max_deleted: int = 10
+    ) -> str:
+        return await asyncio.to_thread(self.delete_environment, env_id, max_deleted)
@@ -1,8 +1,9 @@
 # persistence.py
 
-import json
-from pathlib import Path
 from filelock import FileLock, Timeout
+from pydantic_core import from_json, to_json
+
+from .utils import atomic_write
 
 import logging
 
@@ -23,41 +24,34 @@ def load_environments(
     db_file: str = DEFAULT_DB_FILE, lock_file: str = DEFAULT_LOCK_FILE
 ) -> list:
     """
-    Load environments from a JSON file with file locking.
+    Load environments from a JSON file.
+
+    Saves replace the file atomically, so reading does not need the file lock and
+    never waits for a writer.
 
     Args:
         db_file (str): Path to the JSON database file.
-        lock_file (str): Path to the lock file.
+        lock_file (str): Path to the lock file. Unused; kept for a uniform signature.
 
     Returns:
         list: A list of environment dictionaries.
 
     Raises:
-        PersistenceError: If the file lock cannot be acquired, if JSON decoding fails,
-                        or if any other error occurs during loading.
+        PersistenceError: If JSON decoding fails or if any other error occurs during loading.
     """
     environments = []
-    
-    lock = FileLock(lock_file, timeout=10)
-    logger.info(f"Loading environments from {db_file}")
+
+    logger.debug("Loading environments from %s", db_file)
     try:
-        with lock:
-            if Path(db_file).exists():
-                logger.debug(f"Opening file: {db_file}")
-                with open(db_file, "r") as f:
-                    environments = json.load(f)
-            else:
-                logger.debug(f"File does not exist: {db_file}")
-    except Timeout:
-        logger.error("Could not acquire file lock for loading environments.")
-        raise PersistenceError("Could not acquire file lock for loading environments.")
-    except json.JSONDecodeError:
+        with open(db_file, "rb") as f:
+            environments = from_json(f.read())
+    except FileNotFoundError:
+        logger.debug("File does not exist: %s", db_file)
+    except ValueError:
         logger.error("Error decoding JSON from environments file.")
         raise PersistenceError("Error decoding JSON from environments file.")
     except Exception as e:
-        logger.error("An error occurred while loading environments: %s", e)
-        logger.error("Error type: %s", type(e))
-        logger.error("Error args: %s", e.args)
+        logger.exception("An error occurred while loading environments: %s", e)
         raise PersistenceError(
             f"An error occurred while loading environments: {str(e)}"
         )
@@ -65,6 +59,39 @@ def load_environments(
     return environments
 
 
+def load_environments_json(
+    db_file: str = DEFAULT_DB_FILE, lock_file: str = DEFAULT_LOCK_FILE
+) -> bytes:
+    """
+    Load the raw environments JSON from a file.
+
+    Saves replace the file atomically, so reading does not need the file lock and
+    never waits for a writer.
+
+    Args:
+        db_file (str): Path to the JSON database file.
+        lock_file (str): Path to the lock file. Unused; kept for a uniform signature.
+
+    Returns:
+        bytes: The JSON document, or an empty JSON list if the file does not exist.
+
+    Raises:
+        PersistenceError: If any error occurs during loading.
+    """
+    logger.debug("Loading environments from %s", db_file)
+    try:
+        with open(db_file, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        logger.debug("File does not exist: %s", db_file)
+        return b"[]"
+    except Exception as e:
+        logger.error("An error occurred while loading environments: %s", e)
+        raise PersistenceError(
+            f"An error occurred while loading environments: {str(e)}"
+        )
+
+
 def save_environments(
     environments: list,
     db_file: str = DEFAULT_DB_FILE,
@@ -72,6 +99,7 @@ def save_environments(
 ) -> None:
     """
     Save the list of environments to a JSON file with file locking.
+    The file is replaced atomically.
 
     Args:
         environments (list): The list of environment dictionaries to save.
@@ -82,12 +110,41 @@ def save_environments(
         PersistenceError: If the file lock cannot be acquired or if any error occurs during saving.
     """
     lock = FileLock(lock_file, timeout=10)
-    logger.info(f"Saving environments to {db_file}")
+    logger.debug("Saving environments to %s", db_file)
     try:
+        data = to_json(environments, indent=4)
         with lock:
-            with open(db_file, "w") as f:
+            atomic_write(db_file, data)
+    except Timeout:
+        logger.error("Could not acquire file lock for saving environments.")
+        raise PersistenceError("Could not acquire file lock for saving environments.")
+    except Exception as e:
+        logger.error("An error occurred while saving environments: %s", e)
+        raise PersistenceError(f"An error occurred while saving environments: {str(e)}")
+
+
+def save_environments_json(
+    json_bytes: bytes,
+    db_file: str = DEFAULT_DB_FILE,
+    lock_file: str = DEFAULT_LOCK_FILE,
+) -> None:
+    """
+    Save already-serialized environments JSON to a file with file locking.
+    The file is replaced atomically.
+
+    Args:
+        json_bytes (bytes): The JSON document to write, e.g. from a pydantic TypeAdapter.
+        db_file (str): Path to the JSON database file.
+        lock_file (str): Path to the lock file.
 
-                json.dump(environments, f, indent=4)
+    Raises:
+        PersistenceError: If the file lock cannot be acquired or if any error occurs during saving.
+    """
+    lock = FileLock(lock_file, timeout=10)
+    logger.debug("Saving environments to %s", db_file)
+    try:
+        with lock:
+            atomic_write(db_file, json_bytes)
     except Timeout:
         logger.error("Could not acquire file lock for saving environments.")
         raise PersistenceError("Could not acquire file lock for saving environments.")
@@ -1,13 +1,15 @@
 # user_settings.py
 
-import json
+import stat
 import uuid
 from pathlib import Path
 from filelock import FileLock, Timeout
-from pydantic import BaseModel, Field, ValidationError
-from typing import Optional, List, Dict, Any, Union
+from pydantic import BaseModel, Field
+from pydantic_core import from_json
+from typing import Optional, List, Dict, Any, Tuple, Union
 
-from comfydock_core.environment import Environment
+from .environment import Environment
+from .utils import atomic_write
 
 import logging
 
@@ -54,8 +56,13 @@ class UserSettingsManager:
         self.lock_file = Path(lock_file or f"{settings_file}.lock")
         self.default_comfyui_path = default_comfyui_path
         self.lock_timeout = lock_timeout
+        # FileLock is reentrant and tracks its state per thread, so one instance serves
+        # every save.
+        self._lock = FileLock(self.lock_file, timeout=self.lock_timeout)
+        # Last loaded settings, keyed on the file's (mtime_ns, size) when it was read.
+        self._cache: Optional[Tuple[Tuple[int, int], UserSettings]] = None
         self.logger = logging.getLogger(__name__)
-        self.logger.info(f"UserSettingsManager initialized with settings file: {self.settings_file}")
+        self.logger.info("UserSettingsManager initialized with settings file: %s", self.settings_file)
 
     def _translate_old_format(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -90,49 +97,64 @@ class UserSettingsManager:
         return translated
 
     def _acquire_lock(self) -> FileLock:
-        """Create and acquire a file lock with configured timeout."""
-        return FileLock(self.lock_file, timeout=self.lock_timeout)
+        """Return the settings file lock, configured with the lock timeout."""
+        return self._lock
 
     def load(self) -> UserSettings:
         """
         Load user settings from the configured file.
         Creates default settings if file doesn't exist.
+
+        Saves replace the file atomically, so reading does not take the file lock.
+        The parsed settings are reused until the file's mtime or size changes; each
+        call returns its own copy, so callers may modify it freely.
         """
-        lock = self._acquire_lock()
         try:
-            with lock:
-                if self.settings_file.exists():
-                    if self.settings_file.is_file():  # Verify it's a file, not a directory
-                        with open(self.settings_file, "r") as f:
-                            logger.info("Loading settings from %s", self.settings_file)
-                            data = json.load(f)
-                            # Translate old format to new format
-                            translated_data = self._translate_old_format(data)
-                            return UserSettings(**translated_data)
-                    else:
-                        logger.error("Settings path exists but is not a file: %s", self.settings_file)
-                        raise UserSettingsError(f"Settings path exists but is not a file: {self.settings_file}")
-                else:
-                    logger.error("Settings file does not exist")
-                    raise UserSettingsNotFoundError(f"Settings file does not exist")
-        except Timeout:
-            logger.error("Could not acquire file lock to load settings")
-            raise UserSettingsError("Could not acquire file lock to load settings")
-        except (ValidationError, json.JSONDecodeError) as e:
+            file_stat = self.settings_file.stat()
+        except FileNotFoundError:
+            logger.error("Settings file does not exist")
+            raise UserSettingsNotFoundError(f"Settings file does not exist")
+        if not stat.S_ISREG(file_stat.st_mode):  # Verify it's a file, not a directory
+            logger.error("Settings path exists but is not a file: %s", self.settings_file)
+            raise UserSettingsError(f"Settings path exists but is not a file: {self.settings_file}")
+
+        cache_key = (file_stat.st_mtime_ns, file_stat.st_size)
+        cached = self._cache
+        if cached is not None and cached[0] == cache_key:
+            logger.debug("Settings file unchanged, using cached settings")
+            return cached[1].model_copy(deep=True)
+
+        try:
+            with open(self.settings_file, "rb") as f:
+                logger.info("Loading settings from %s", self.settings_file)
+                data = from_json(f.read())
+            # Translate old format to new format
+            translated_data = self._translate_old_format(data)
+            settings = UserSettings.model_validate(translated_data)
+        except ValueError as e:
             logger.error("Invalid settings format: %s", e)
             raise UserSettingsError(f"Invalid settings format: {str(e)}")
         # except Exception as e:
         #     logger.error("Error loading settings: %s", e)
         #     raise UserSettingsError(f"Error loading settings: {str(e)}")
 
+        self._cache = (cache_key, settings)
+        return settings.model_copy(deep=True)
+
     def save(self, settings: UserSettings) -> None:
-        """Save user settings to the configured file."""
+        """Save user settings to the configured file, replacing it atomically."""
         lock = self._acquire_lock()
         try:
+            data = settings.model_dump_json(indent=4).encode("utf-8")
             with lock:
-                with open(self.settings_file, "w") as f:
-                    logger.info("Saving settings to %s", self.settings_file)
-                    json.dump(settings.model_dump(), f, indent=4)
+                logger.info("Saving settings to %s", self.settings_file)
+                atomic_write(str(self.settings_file), data)
+                # Every writer holds the lock, so the file we stat is the one just written.
+                file_stat = self.settings_file.stat()
+                self._cache = (
+                    (file_stat.st_mtime_ns, file_stat.st_size),
+                    settings.model_copy(deep=True),
+                )
         except Timeout:
             logger.error("Could not acquire file lock to save settings")
             raise UserSettingsError("Could not acquire file lock to save settings")
@@ -143,7 +165,12 @@ class UserSettingsManager:
     def update(self, new_settings: Dict[str, Any]) -> UserSettings:
         """Update settings with partial values and persist changes."""
         current = self.load()
+        if not new_settings:
+            return current
         updated = current.model_copy(update=new_settings)
+        if updated == current:
+            logger.debug("Settings unchanged, skipping save")
+            return updated
         self.save(updated)
         return updated
 
@@ -187,22 +214,50 @@ class UserSettingsManager:
         # First check if the folder is used by any environments
         self._validate_folder_usage(folder_id, envs)
 
-        original_count = len(settings.folders)
-        settings.folders = [f for f in settings.folders if f.id != folder_id]
+        index = next(
+            (i for i, f in enumerate(settings.folders) if f.id == folder_id), None
+        )
+        if index is None:
+            logger.error("Folder not found")
+            raise ValueError("Folder not found")
 
-        if len(settings.folders) == original_count:
+        settings.folders.pop(index)
+        return settings
+
+    def delete_folders(
+        self, settings: UserSettings, folder_ids: List[str], envs: List[Environment]
+    ) -> UserSettings:
+        """
+        Delete several folders from settings. Nothing is deleted unless every folder
+        exists and none is used by an environment.
+        """
+        to_delete = set(folder_ids)
+        used = self._collect_used_folder_ids(envs)
+        if not to_delete.isdisjoint(used):
+            logger.error("Folder contains environments and cannot be deleted")
+            raise ValueError("Folder contains environments and cannot be deleted")
+
+        remaining = [f for f in settings.folders if f.id not in to_delete]
+        if len(settings.folders) - len(remaining) != len(to_delete):
             logger.error("Folder not found")
             raise ValueError("Folder not found")
 
+        settings.folders = remaining
         return settings
 
+    def _collect_used_folder_ids(self, envs: List[Environment]) -> frozenset[str]:
+        """Collect the ids of all folders that contain at least one environment."""
+        return frozenset(
+            folder_id for env in envs for folder_id in env.folderIds
+        )
+
     def _validate_folder_usage(
         self,
         folder_id: str,
         envs: List[Environment],
     ) -> None:
         """Check if a folder is used by any environments."""
-        logger.info(f"Validating folder usage for {folder_id}")
+        logger.info("Validating folder usage for %s", folder_id)
         if any(folder_id in env.folderIds for env in envs):
             logger.error("Folder contains environments and cannot be deleted")
             raise ValueError("Folder contains environments and cannot be deleted")
@@ -1,7 +1,9 @@
 # utils.py
 
+import os
 import random
 import string
+import time
 import ipaddress
 from typing import Dict, List, Tuple, Union, Optional
 from typing import Tuple
@@ -11,6 +13,57 @@ import io
 import re
 from collections.abc import Mapping, Sequence
 
+
+# On Windows, replacing a file fails while another process has it open for reading.
+REPLACE_RETRIES = 5
+REPLACE_RETRY_DELAY = 0.05  # seconds
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Write data to path atomically: readers see either the old or the new file, never
+    a partially written one. An existing file keeps its permissions.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    # Unlike mkstemp, which always uses 0600, this lets the current umask decide the
+    # mode of a new file, as open() would.
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    while True:
+        tmp_path = os.path.join(
+            directory, f".{os.path.basename(path)}.{generate_id()}.tmp"
+        )
+        try:
+            fd = os.open(tmp_path, flags, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(tmp_path, path)
+                return
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_DELAY)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def generate_id(length=8):
     """
     Generate a random ID of a given length.
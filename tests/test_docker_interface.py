@@ -1,15 +1,21 @@
 # test_docker_interface.py
 
+import asyncio
+import io
+import json
 import logging
+import tarfile
 import pytest
 from pathlib import Path
 
 import docker.errors
 
+import src.comfydock_core.docker_interface as docker_interface_module
 from src.comfydock_core.docker_interface import (
     DockerInterface,
     DockerInterfaceConnectionError,
     DockerInterfaceContainerNotFoundError,
+    DockerInterfaceError,
     DockerInterfaceImageNotFoundError,
 )
 
@@ -85,6 +91,9 @@ class DummyContainersManager:
         return DummyContainer(container_id)
     def run(self, image, name, ports, detach=True, remove=True, environment=None):
         return DummyContainer(name, status="running")
+    def list(self, all=False, sparse=False, filters=None):
+        self.list_calls = getattr(self, "list_calls", 0) + 1
+        return [DummyContainer(cid, status="running") for cid in filters["id"] if cid != "not_found"]
 
 class DummyImagesManager:
     def get(self, image):
@@ -100,7 +109,27 @@ class DummyImagesManager:
         return DummyImage("dummy_repo", "dummy_tag")
 
 class DummyAPI:
+    base_url = "http+docker://localhost"
+
+    def __init__(self):
+        self.execs = []
+        self.exec_output = [b"installed\n"]
+        self.exec_exit_code = 0
+
+    def exec_create(self, container, cmd, stdout=True, stderr=True):
+        self.execs.append((container, cmd))
+        return {"Id": f"exec{len(self.execs)}"}
+
+    def exec_start(self, exec_id, stream=False):
+        return iter(self.exec_output)
+
+    def exec_inspect(self, exec_id):
+        return {"ExitCode": self.exec_exit_code}
+
     def pull(self, image, stream, decode):
+        if not decode:
+            yield b'{"status": "Downloading", "id": "dummy_layer"}\r\n'
+            return
         yield {"status": "Downloading", "id": "dummy_layer"}
 
 class DummyDockerClient:
@@ -174,6 +203,12 @@ def test_get_container_not_found(docker_iface):
     with pytest.raises(DockerInterfaceContainerNotFoundError):
         docker_iface.get_container("not_found")
 
+def test_get_container_statuses(docker_iface):
+    statuses = docker_iface.get_container_statuses(["a", "b", "not_found"])
+    assert statuses == {"a": "running", "b": "running"}
+    assert docker_iface.client.containers.list_calls == 1
+    assert docker_iface.get_container_statuses([]) == {}
+
 def test_commit_container(docker_iface):
     container = DummyContainer("test")
     image = docker_iface.commit_container(container, repository="repo", tag="v1")
@@ -200,6 +235,11 @@ def test_start_container(docker_iface):
     docker_iface.start_container(container)
     assert container.status == "running"
 
+def test_start_container_assume_running(docker_iface):
+    container = DummyContainer("test", status="stopped")
+    docker_iface.start_container(container, assume_state="running")
+    assert container.status == "stopped"
+
 def test_stop_container(docker_iface):
     container = DummyContainer("test", status="running")
     docker_iface.stop_container(container, timeout=1)
@@ -215,6 +255,14 @@ def test_restart_container(docker_iface, monkeypatch):
     docker_iface.restart_container("test")
     assert container.status == "running"
 
+def test_restart_container_accepts_container_object(docker_iface, monkeypatch):
+    container = DummyContainer("test", status="stopped")
+    def fail_get_container(cid):
+        pytest.fail("get_container should not be called for a container object")
+    monkeypatch.setattr(docker_iface, "get_container", fail_get_container)
+    docker_iface.restart_container(container)
+    assert container.status == "running"
+
 # --- Tests for Image Pulling and Running ---
 
 def test_pull_image_api(docker_iface):
@@ -222,6 +270,12 @@ def test_pull_image_api(docker_iface):
     first = next(gen)
     assert "status" in first
 
+def test_pull_image_api_raw(docker_iface):
+    gen = docker_iface.pull_image_api("dummy_image", decode=False)
+    first = next(gen)
+    assert isinstance(first, bytes)
+    assert b'"status"' in first
+
 def test_try_pull_image_image_exists(docker_iface, caplog):
     caplog.set_level(logging.INFO)
     docker_iface.try_pull_image("dummy_image")
@@ -238,6 +292,19 @@ def test_try_pull_image_pulls(docker_iface, monkeypatch, caplog):
     assert "Pulling from Docker Hub" in caplog.text
 
 
+def test_try_pull_images(docker_iface, monkeypatch):
+    pulled = []
+    def fake_get(image):
+        raise docker.errors.ImageNotFound("Not found")
+    def fake_pull(image):
+        pulled.append(image)
+        return DummyImage(image, "latest")
+    monkeypatch.setattr(docker_iface.client.images, "get", fake_get)
+    monkeypatch.setattr(docker_iface.client.images, "pull", fake_pull)
+    docker_iface.try_pull_images(["image1", "image2", "image3"])
+    assert sorted(pulled) == ["image1", "image2", "image3"]
+
+
 def test_run_container(docker_iface):
     container = docker_iface.run_container(
         image="dummy_image", name="test_run", ports={"8000/tcp": 8000}
@@ -263,13 +330,135 @@ def test_copy_to_container(tmp_path, docker_iface, monkeypatch):
         def __init__(self, id, status="stopped"):
             super().__init__(id, status)
             self.archive_called = False
+            self.archive_data = b""
         def put_archive(self, container_path, tar_data):
             self.archive_called = True
+            self.archive_data = tar_data.read()
             return True
     dummy_container = RecordingContainer("rec")
     monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
     docker_iface.copy_to_container("rec", str(src_dir), "/container/path", [])
     assert dummy_container.archive_called
+    with tarfile.open(fileobj=io.BytesIO(dummy_container.archive_data)) as archive:
+        assert archive.getnames() == ["test.txt"]
+        assert archive.extractfile("test.txt").read() == b"hello world"
+
+def test_copy_to_container_compresses_for_remote_daemon(tmp_path, docker_iface, monkeypatch):
+    src_dir = tmp_path / "source"
+    src_dir.mkdir()
+    (src_dir / "test.txt").write_text("hello world")
+    class RecordingContainer(DummyContainer):
+        def put_archive(self, container_path, tar_data):
+            self.archive_data = tar_data.read()
+            return True
+    dummy_container = RecordingContainer("rec")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    assert not docker_iface.compress_archives
+    docker_iface.compress_archives = True
+    docker_iface.copy_to_container("rec", str(src_dir), "/container/path", [])
+    assert dummy_container.archive_data[:2] == b"\x1f\x8b"
+    with tarfile.open(fileobj=io.BytesIO(dummy_container.archive_data)) as archive:
+        assert archive.extractfile("test.txt").read() == b"hello world"
+
+def test_copy_to_container_creates_missing_directory(tmp_path, docker_iface, monkeypatch):
+    src_dir = tmp_path / "source"
+    src_dir.mkdir()
+    (src_dir / "test.txt").write_text("hello world")
+    class MissingDirContainer(DummyContainer):
+        def __init__(self, id, status="stopped"):
+            super().__init__(id, status)
+            self.commands = []
+            self.archives = []
+        def exec_run(self, command, stdout=True, stderr=True, stream=False):
+            self.commands.append(command)
+            return DummyExecResult(b"", stream=stream)
+        def put_archive(self, container_path, tar_data):
+            self.archives.append(tar_data.read())
+            if not self.commands:
+                raise docker.errors.NotFound("Could not find the file")
+            return True
+    dummy_container = MissingDirContainer("rec")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    docker_iface.copy_to_container("rec", str(src_dir), "/container/path", [])
+    assert dummy_container.commands == ["mkdir -p /container/path"]
+    # Only the empty probe archive hits the missing directory; the tree is
+    # archived and sent once.
+    assert len(dummy_container.archives) == 2
+    with tarfile.open(fileobj=io.BytesIO(dummy_container.archives[0])) as archive:
+        assert archive.getnames() == []
+    with tarfile.open(fileobj=io.BytesIO(dummy_container.archives[1])) as archive:
+        assert archive.getnames() == ["test.txt"]
+
+def test_copy_to_container_skips_mkdir_for_existing_directory(tmp_path, docker_iface, monkeypatch):
+    src_dir = tmp_path / "source"
+    src_dir.mkdir()
+    (src_dir / "test.txt").write_text("hello world")
+    class ExistingDirContainer(DummyContainer):
+        def exec_run(self, command, stdout=True, stderr=True, stream=False):
+            pytest.fail(f"Unexpected exec_run: {command}")
+        def put_archive(self, container_path, tar_data):
+            tar_data.read()
+            return True
+    dummy_container = ExistingDirContainer("rec")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    docker_iface.copy_to_container("rec", str(src_dir), "/container/path", [])
+
+def test_copy_to_container_copies_single_file(tmp_path, docker_iface, monkeypatch):
+    src_file = tmp_path / "extra_model_paths.yaml"
+    src_file.write_text("base_path: /models")
+    class RecordingContainer(DummyContainer):
+        def put_archive(self, container_path, tar_data):
+            self.container_path = container_path
+            self.archive_data = tar_data.read()
+            return True
+    dummy_container = RecordingContainer("rec")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    docker_iface.copy_to_container("rec", str(src_file), "/container/path", [])
+    assert dummy_container.container_path == "/container/path"
+    with tarfile.open(fileobj=io.BytesIO(dummy_container.archive_data)) as archive:
+        assert archive.getnames() == ["extra_model_paths.yaml"]
+        assert archive.extractfile("extra_model_paths.yaml").read() == b"base_path: /models"
+
+def test_copy_to_container_aborts_upload_when_archive_fails(tmp_path, docker_iface, monkeypatch):
+    src_dir = tmp_path / "source"
+    src_dir.mkdir()
+    class RecordingContainer(DummyContainer):
+        def __init__(self, id, status="stopped"):
+            super().__init__(id, status)
+            self.completed_uploads = 0
+        def put_archive(self, container_path, tar_data):
+            tar_data.read()
+            self.completed_uploads += 1
+            return True
+    def failing_write_tar(tar_stream, source_path, exclude_dirs):
+        tar_stream.write(b"partial")
+        raise PermissionError("unreadable file")
+    dummy_container = RecordingContainer("rec")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    monkeypatch.setattr(docker_iface, "_write_tar", failing_write_tar)
+    with pytest.raises(DockerInterfaceError, match="unreadable file"):
+        docker_iface.copy_to_container("rec", str(src_dir), "/container/path", [])
+    # Only the empty probe archive completed; the partial tree was never sent whole.
+    assert dummy_container.completed_uploads == 1
+
+def test_copy_to_container_skips_excluded_dirs(tmp_path, docker_iface, monkeypatch):
+    src_dir = tmp_path / "custom_nodes"
+    (src_dir / "node1" / "__pycache__").mkdir(parents=True)
+    (src_dir / "node1" / "__init__.py").write_text("")
+    (src_dir / "node1" / "__pycache__" / "__init__.cpython-312.pyc").write_bytes(b"")
+    (src_dir / "ComfyUI-Manager").mkdir()
+    (src_dir / "ComfyUI-Manager" / "manager.py").write_text("")
+    class RecordingContainer(DummyContainer):
+        def put_archive(self, container_path, tar_data):
+            self.archive_data = tar_data.read()
+            return True
+    dummy_container = RecordingContainer("rec")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    docker_iface.copy_to_container(
+        "rec", str(src_dir), "/container/path", ["__pycache__", "ComfyUI-Manager"]
+    )
+    with tarfile.open(fileobj=io.BytesIO(dummy_container.archive_data)) as archive:
+        assert sorted(archive.getnames()) == ["node1", "node1/__init__.py"]
 
 # --- Tests for Mount Configuration ---
 
@@ -322,19 +511,173 @@ def test_create_mounts_old_style(docker_iface, tmp_path):
 def test_install_custom_nodes(docker_iface, monkeypatch):
     # Create a dummy container that simulates exec_run for various commands.
     class CustomNodesContainer(DummyContainer):
+        def __init__(self, id, status="stopped"):
+            super().__init__(id, status)
+            self.commands = []
+            self.archives = []
         def exec_run(self, command, stdout=True, stderr=True, stream=False):
+            if isinstance(command, list):
+                command = " ".join(command)
+            self.commands.append(command)
             if "find" in command:
-                return DummyExecResult([b"node1\n"], stream=True)
-            if "[ -f" in command:
-                return DummyExecResult(b"exists", stream=False)
-            if "cat" in command:
-                return DummyExecResult(b"package1\npackage2", stream=False)
-            if "pip install" in command:
-                return DummyExecResult([b"installed\n"], stream=True)
+                return DummyExecResult(
+                    b"/app/ComfyUI/custom_nodes/node1/requirements.txt\0"
+                    b"package1\ntorch>=2.0\n\0"
+                    b"/app/ComfyUI/custom_nodes/node2/requirements.txt\0"
+                    b"package2\n\0"
+                    b"/app/ComfyUI/custom_nodes/node3/requirements.txt\0"
+                    b"# only blacklisted\ntorch\n\0",
+                    stream=False,
+                )
             return DummyExecResult(b"", stream=stream)
+        def put_archive(self, container_path, tar_data):
+            self.archives.append((container_path, tar_data))
+            return True
     dummy_container = CustomNodesContainer("cn")
     monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
-    # This should run without raising an error.
-    docker_iface.install_custom_nodes("cn", blacklist=[], exclude_dirs=[])
+    docker_iface.install_custom_nodes("cn", blacklist=["torch"], exclude_dirs=[])
+
+    # One exec to read every requirements.txt and one to install and clean up.
+    assert len(dummy_container.commands) == 1
+    execs = docker_iface.client.api.execs
+    assert len(execs) == 1
+    container_id, install_command = execs[0]
+    install_command = " ".join(install_command)
+    assert container_id == "cn"
+    assert "pip install" in install_command
+    assert "rm -f" in install_command
+    assert "node1/temp_requirements.txt" in install_command
+    assert "node3" not in install_command
+    assert len(dummy_container.archives) == 1
+    container_path, tar_data = dummy_container.archives[0]
+    assert container_path == "/app/ComfyUI/custom_nodes"
+    with tarfile.open(fileobj=io.BytesIO(tar_data)) as archive:
+        # Each node gets its own filtered file in its own directory; a node with
+        # only blacklisted dependencies gets none.
+        assert sorted(archive.getnames()) == [
+            "node1/temp_requirements.txt",
+            "node2/temp_requirements.txt",
+        ]
+        node1 = archive.extractfile("node1/temp_requirements.txt").read().decode("utf-8")
+        node2 = archive.extractfile("node2/temp_requirements.txt").read().decode("utf-8")
+    assert node1 == "package1\n"
+    assert node2 == "package2\n"
+
+def test_install_custom_nodes_skips_exec_when_nothing_to_install(docker_iface, monkeypatch):
+    class BlacklistedOnlyContainer(DummyContainer):
+        def __init__(self, id, status="stopped"):
+            super().__init__(id, status)
+            self.commands = []
+            self.archives = []
+        def exec_run(self, command, stdout=True, stderr=True, stream=False):
+            self.commands.append(command)
+            return DummyExecResult(
+                b"/app/ComfyUI/custom_nodes/node1/requirements.txt\0torch\n\0",
+                stream=False,
+            )
+        def put_archive(self, container_path, tar_data):
+            self.archives.append((container_path, tar_data))
+            return True
+    dummy_container = BlacklistedOnlyContainer("cn")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    docker_iface.install_custom_nodes("cn", blacklist=["torch"], exclude_dirs=[])
+
+    assert len(dummy_container.commands) == 1
+    assert dummy_container.archives == []
+    assert docker_iface.client.api.execs == []
+
+def test_install_custom_nodes_logs_pip_failure(docker_iface, monkeypatch, caplog):
+    class FailingInstallContainer(DummyContainer):
+        def exec_run(self, command, stdout=True, stderr=True, stream=False):
+            return DummyExecResult(
+                b"/app/ComfyUI/custom_nodes/node1/requirements.txt\0badpkg\n\0",
+                stream=False,
+            )
+        def put_archive(self, container_path, tar_data):
+            return True
+    dummy_container = FailingInstallContainer("cn")
+    monkeypatch.setattr(docker_iface, "get_container", lambda cid: dummy_container)
+    docker_iface.client.api.exec_output = [b"ERROR: No matching distribution found for badpkg\n"]
+    docker_iface.client.api.exec_exit_code = 1
+    with caplog.at_level("ERROR"):
+        docker_iface.install_custom_nodes("cn", blacklist=["torch"], exclude_dirs=[])
+
+    errors = [r.getMessage() for r in caplog.records if r.levelname == "ERROR"]
+    assert len(errors) == 1
+    assert "exited with code 1" in errors[0]
+    assert "No matching distribution found for badpkg" in errors[0]
+
+def test_event_listener_requests_container_events_only(docker_iface, monkeypatch):
+    subscriptions = []
+
+    class FakeSubscriber:
+        def __init__(self):
+            self.events = [{"Type": "container", "Action": "start"}, None]
+
+        async def get(self):
+            return self.events.pop(0)
+
+    class FakeEvents:
+        def subscribe(self, **params):
+            subscriptions.append(params)
+            return FakeSubscriber()
+
+    class FakeDocker:
+        events = FakeEvents()
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(docker_interface_module, "Docker", FakeDocker)
+
+    async def collect():
+        return [event async for event in docker_iface.event_listener()]
+
+    assert asyncio.run(collect()) == [{"Type": "container", "Action": "start"}]
+    assert json.loads(subscriptions[0]["filters"]) == {"type": ["container"]}
+
+def test_concurrent_event_listeners_read_their_own_subscriptions(docker_iface, monkeypatch):
+    class FakeSubscriber:
+        def __init__(self, name):
+            self.events = [{"Type": "container", "Action": name, "n": n} for n in range(2)]
+            self.events.append(None)
+
+        async def get(self):
+            return self.events.pop(0)
+
+    class FakeEvents:
+        def __init__(self):
+            self.names = iter(["a", "b"])
+
+        def subscribe(self, **params):
+            return FakeSubscriber(next(self.names))
+
+    events = FakeEvents()
+
+    class FakeDocker:
+        def __init__(self):
+            self.events = events
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(docker_interface_module, "Docker", FakeDocker)
+
+    async def interleave():
+        listener_a = docker_iface.event_listener()
+        listener_b = docker_iface.event_listener()
+        received = [await listener_a.__anext__(), await listener_b.__anext__()]
+        received.append(await listener_a.__anext__())
+        await listener_a.aclose()
+        await listener_b.aclose()
+        return [(event["Action"], event["n"]) for event in received]
+
+    assert asyncio.run(interleave()) == [("a", 0), ("b", 0), ("a", 1)]
 
 # --- End of Tests ---
@@ -1,5 +1,11 @@
+import asyncio
+import json
+import threading
 import time
+from collections import Counter
+
 import pytest
+import src.comfydock_core.environment
 
 # Import the EnvironmentManager and related classes from your module.
 # Adjust the import if your module structure differs.
@@ -9,7 +15,10 @@ from src.comfydock_core.environment import (
     EnvironmentUpdate,
     DELETED_FOLDER_ID,
 )
-from src.comfydock_core.docker_interface import DockerInterfaceContainerNotFoundError
+from src.comfydock_core.docker_interface import (
+    DockerInterfaceConnectionError,
+    DockerInterfaceContainerNotFoundError,
+)
 
 
 # --- Fake Docker Interface and Container ---
@@ -46,6 +55,14 @@ class FakeDockerInterface:
             return self.containers[container_id]
         raise DockerInterfaceContainerNotFoundError(f"Container {container_id} not found.")
 
+    def get_container_statuses(self, container_ids):
+        self.status_calls = getattr(self, "status_calls", 0) + 1
+        return {
+            cid: self.containers[cid].status
+            for cid in container_ids
+            if cid in self.containers
+        }
+
     def commit_container(self, container, repository, tag):
         # Simulate successful commit (no-op)
         return
@@ -61,7 +78,10 @@ class FakeDockerInterface:
     def get_image(self, image):
         return image
 
-    def start_container(self, container):
+    def start_container(self, container, assume_state=None):
+        if assume_state == "running":
+            return
+        self.start_calls = getattr(self, "start_calls", 0) + 1
         container.start()
 
 
@@ -92,21 +112,42 @@ def fake_persistence(monkeypatch):
     """
     fake_db = []
 
-    def fake_save(environments, db_file, lock_file):
+    def fake_save(json_bytes, db_file, lock_file):
         # Overwrite the fake database contents.
         fake_db.clear()
-        fake_db.extend(environments)
+        fake_db.extend(json.loads(json_bytes))
 
     def fake_load(db_file, lock_file):
-        return fake_db.copy()
+        return json.dumps(fake_db).encode()
 
     # Patch the persistence functions in the environment module.
-    import src.comfydock_core.environment
-    monkeypatch.setattr(src.comfydock_core.environment, "persistence_save_environments", fake_save)
-    monkeypatch.setattr(src.comfydock_core.environment, "persistence_load_environments", fake_load)
+    monkeypatch.setattr(src.comfydock_core.environment, "persistence_save_environments_json", fake_save)
+    monkeypatch.setattr(src.comfydock_core.environment, "persistence_load_environments_json", fake_load)
     return fake_db
 
 
+@pytest.fixture
+def persistence_calls(monkeypatch, fake_persistence):
+    """
+    Count calls to the fake persistence functions by name ("load", "save").
+    """
+    calls = Counter()
+    save = src.comfydock_core.environment.persistence_save_environments_json
+    load = src.comfydock_core.environment.persistence_load_environments_json
+
+    def counting_save(*args):
+        calls["save"] += 1
+        return save(*args)
+
+    def counting_load(*args):
+        calls["load"] += 1
+        return load(*args)
+
+    monkeypatch.setattr(src.comfydock_core.environment, "persistence_save_environments_json", counting_save)
+    monkeypatch.setattr(src.comfydock_core.environment, "persistence_load_environments_json", counting_load)
+    return calls
+
+
 # --- Manager Fixture ---
 
 @pytest.fixture
@@ -119,7 +160,6 @@ def manager(monkeypatch, fake_persistence):
     mgr.docker_iface = FakeDockerInterface()
 
     # Patch generate_id to always return a fixed value ("fixedid")
-    import src.comfydock_core.environment
     monkeypatch.setattr(src.comfydock_core.environment, "generate_id", lambda: "fixedid")
     return mgr
 
@@ -145,6 +185,23 @@ def test_create_environment(manager, fake_persistence):
     environments = manager.load_environments()
     assert any(e.id == created_env.id for e in environments)
 
+def test_load_environments_batches_status_lookups(manager, fake_persistence):
+    for i in range(3):
+        manager.create_environment(
+            Environment(name=f"Env{i}", image="testimage", comfyui_path="/tmp")
+        )
+    manager.docker_iface.status_calls = 0
+    environments = manager.load_environments()
+    manager.load_environments()
+    # One Docker call covers every environment and is reused within the TTL.
+    assert manager.docker_iface.status_calls == 1
+    assert all(e.status == "created" for e in environments)
+
+    del manager.docker_iface.containers[environments[0].id]
+    manager._invalidate_status_cache()
+    environments = manager.load_environments()
+    assert environments[0].status == "dead"
+
 def test_update_environment(manager, fake_persistence):
     env = Environment(
         name="TestEnv",
@@ -183,6 +240,17 @@ def test_activate_deactivate_environment(manager, fake_persistence):
     container = manager.docker_iface.get_container(created_env.id)
     assert container.status == "stopped"
 
+def test_activate_running_environment_skips_start(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="RunningEnv", image="testimage", comfyui_path="/tmp")
+    )
+    manager.activate_environment(created.id)
+    assert manager.docker_iface.start_calls == 1
+
+    # The load at the start of activation caches the container as running.
+    assert manager.activate_environment(created.id).status == "running"
+    assert manager.docker_iface.start_calls == 1
+
 def test_duplicate_environment(manager, fake_persistence):
     # Create an original environment.
     original_env = Environment(
@@ -279,4 +347,369 @@ def test_prune_deleted_environments(manager, fake_persistence):
     # The remaining environments should still be present and marked as deleted.
     for e in envs[1:]:
         env_obj = manager.get_environment(e.id)
-        assert DELETED_FOLDER_ID in env_obj.folderIds
\ No newline at end of file
+        assert DELETED_FOLDER_ID in env_obj.folderIds
+
+def test_async_wrappers_run_sync_methods(manager, fake_persistence):
+    env = Environment(name="AsyncEnv", image="testimage", comfyui_path="/tmp")
+
+    async def scenario():
+        created = await manager.create_environment_async(env)
+        activated = await manager.activate_environment_async(created.id)
+        loaded = await manager.get_environment_async(created.id)
+        return activated, loaded
+
+    activated, loaded = asyncio.run(scenario())
+    assert activated.status == "running"
+    assert loaded.id == activated.id
+
+
+def test_docker_events_keep_status_cache_fresh(manager, fake_persistence):
+    # Without event monitoring every load would refetch statuses.
+    manager.status_cache_ttl = 0
+    created = manager.create_environment(
+        Environment(name="EventEnv", image="testimage", comfyui_path="/tmp")
+    )
+    calls = []
+    statuses = []
+
+    async def event_listener():
+        manager.docker_iface.status_calls = 0
+        manager.load_environments()
+        manager.load_environments()
+        calls.append(manager.docker_iface.status_calls)
+        yield {"Type": "container", "Action": "die", "id": created.id}
+        # The event updates the cached status without another Docker call.
+        statuses.append(manager.get_environment(created.id).status)
+        calls.append(manager.docker_iface.status_calls)
+
+    manager.docker_iface.event_listener = event_listener
+    asyncio.run(manager.monitor_docker_events())
+    assert calls == [1, 1]
+    assert statuses == ["exited"]
+    assert not manager._status_events_monitored
+
+
+def test_status_fetch_racing_invalidation_is_not_cached(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="RaceEnv", image="testimage", comfyui_path="/tmp")
+    )
+    manager._invalidate_status_cache()
+    get_container_statuses = manager.docker_iface.get_container_statuses
+
+    def racing_get_container_statuses(container_ids):
+        statuses = get_container_statuses(container_ids)
+        # The container changes after Docker answered but before the result is cached.
+        manager._invalidate_status_cache()
+        return statuses
+
+    manager.docker_iface.get_container_statuses = racing_get_container_statuses
+    manager._get_container_statuses([created.id])
+    assert manager._status_cache is None
+
+
+def test_status_fetch_racing_docker_event_is_not_cached(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="EventRaceEnv", image="testimage", comfyui_path="/tmp")
+    )
+    manager._invalidate_status_cache()
+    manager._status_events_monitored = True
+    get_container_statuses = manager.docker_iface.get_container_statuses
+
+    def racing_get_container_statuses(container_ids):
+        statuses = get_container_statuses(container_ids)
+        # The container dies while the snapshot is on its way back, when there is no
+        # cache for the event to update.
+        manager._apply_status_event(created.id, "die")
+        return statuses
+
+    manager.docker_iface.get_container_statuses = racing_get_container_statuses
+    manager._get_container_statuses([created.id])
+    assert manager._status_cache is None
+
+
+def test_monitored_status_cache_still_expires(manager, fake_persistence, monkeypatch):
+    created = manager.create_environment(
+        Environment(name="ExpiringEnv", image="testimage", comfyui_path="/tmp")
+    )
+    manager._status_events_monitored = True
+    manager._get_container_statuses([created.id])
+    assert manager._cached_status(created.id) == "created"
+
+    monkeypatch.setattr(src.comfydock_core.environment, "MONITORED_STATUS_CACHE_TTL", 0)
+    assert manager._cached_status(created.id) is None
+
+
+def test_concurrent_changes_to_different_environments_are_kept(manager, fake_persistence):
+    env_a = manager.create_environment(
+        Environment(name="EnvA", image="testimage", comfyui_path="/tmp")
+    )
+    env_b = manager.create_environment(
+        Environment(name="EnvB", image="testimage", comfyui_path="/tmp")
+    )
+    starting = threading.Event()
+    release = threading.Event()
+    start_container = manager.docker_iface.start_container
+
+    def slow_start(container, assume_state=None):
+        starting.set()
+        release.wait(5)
+        start_container(container, assume_state)
+
+    manager.docker_iface.start_container = slow_start
+    worker = threading.Thread(
+        target=manager.activate_environment, args=(env_a.id,), kwargs={"allow_multiple": True}
+    )
+    worker.start()
+    starting.wait(5)
+    # Updating another environment must not wait for, or be overwritten by, the activation.
+    manager.update_environment(env_b.id, EnvironmentUpdate(name="RenamedB"))
+    release.set()
+    worker.join(5)
+
+    stored = {e["id"]: e for e in fake_persistence}
+    assert stored[env_a.id]["status"] == "running"
+    assert stored[env_b.id]["name"] == "RenamedB"
+
+
+def test_changes_do_not_resurrect_removed_environments(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="PrunedEnv", image="testimage", comfyui_path="/tmp")
+    )
+    start_container = manager.docker_iface.start_container
+
+    def start_while_pruned(container, assume_state=None):
+        # A concurrent prune removes the environment while it is being activated.
+        manager._store_changes(removed_ids={created.id})
+        start_container(container, assume_state)
+
+    manager.docker_iface.start_container = start_while_pruned
+    manager.activate_environment(created.id)
+    assert all(e["id"] != created.id for e in fake_persistence)
+
+
+def test_mutations_skip_status_refresh(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="TestEnv", image="testimage", comfyui_path="/tmp")
+    )
+    manager.docker_iface.status_calls = 0
+    manager.update_environment(created.id, EnvironmentUpdate(name="Renamed"))
+    manager.deactivate_environment(created.id)
+    manager.delete_environment(created.id)
+    assert manager.docker_iface.status_calls == 0
+
+
+def test_activate_stops_other_environments_concurrently(manager, fake_persistence):
+    envs = [
+        manager.create_environment(
+            Environment(name=f"Env{i}", image="testimage", comfyui_path="/tmp")
+        )
+        for i in range(3)
+    ]
+    for env in envs[1:]:
+        manager.activate_environment(env.id, allow_multiple=True)
+
+    # Both stops must be in flight at the same time for the barrier to release.
+    barrier = threading.Barrier(2, timeout=5)
+    stop_container = manager.docker_iface.stop_container
+
+    def stop_together(container, timeout=2):
+        barrier.wait()
+        stop_container(container, timeout)
+
+    manager.docker_iface.stop_container = stop_together
+    manager.activate_environment(envs[0].id)
+    for env in envs[1:]:
+        assert manager.docker_iface.get_container(env.id).status == "stopped"
+
+
+def test_load_environments_json_and_statuses(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="TestEnv", image="testimage", comfyui_path="/tmp")
+    )
+    data = json.loads(manager.load_environments_json())
+    assert [e["id"] for e in data] == [created.id]
+    assert manager.get_environment_statuses() == {created.id: "created"}
+
+    del manager.docker_iface.containers[created.id]
+    manager._invalidate_status_cache()
+    assert manager.get_environment_statuses() == {created.id: "dead"}
+
+
+def test_manager_connects_to_docker_lazily(monkeypatch):
+    calls = []
+    def fake_get_docker_interface():
+        calls.append(1)
+        return FakeDockerInterface()
+    monkeypatch.setattr(
+        src.comfydock_core.environment, "get_docker_interface", fake_get_docker_interface
+    )
+    mgr = EnvironmentManager(db_file="dummy_db.json", lock_file="dummy_lock.lock")
+    assert calls == []
+    assert mgr.docker_iface is mgr.docker_iface
+    assert calls == [1]
+
+
+def test_docker_connection_errors_surface_on_first_use(monkeypatch):
+    calls = []
+    def failing_get_docker_interface():
+        calls.append(1)
+        raise DockerInterfaceConnectionError("Docker is not running")
+    monkeypatch.setattr(
+        src.comfydock_core.environment, "get_docker_interface", failing_get_docker_interface
+    )
+    # Constructing the manager no longer needs a running daemon.
+    mgr = EnvironmentManager(db_file="dummy_db.json", lock_file="dummy_lock.lock")
+    assert calls == []
+    with pytest.raises(DockerInterfaceConnectionError, match="Docker is not running"):
+        mgr.docker_iface
+    # A failed connection is not cached, so the next use tries again.
+    with pytest.raises(DockerInterfaceConnectionError):
+        mgr.docker_iface
+    assert calls == [1, 1]
+
+
+def test_concurrent_changes_are_written_together(manager, fake_persistence, persistence_calls):
+    envs = [
+        manager.create_environment(
+            Environment(name=f"Env{i}", image="testimage", comfyui_path="/tmp")
+        )
+        for i in range(3)
+    ]
+    persistence_calls.clear()
+
+    # Hold the database lock so the updates queue up behind it.
+    with manager._db_lock:
+        workers = [
+            threading.Thread(
+                target=manager.update_environment,
+                args=(env.id, EnvironmentUpdate(name=f"Renamed{i}")),
+            )
+            for i, env in enumerate(envs)
+        ]
+        for worker in workers:
+            worker.start()
+        deadline = time.monotonic() + 5
+        while len(manager._pending_changes) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    for worker in workers:
+        worker.join(5)
+
+    assert persistence_calls["save"] == 1
+    assert sorted(e["name"] for e in fake_persistence) == ["Renamed0", "Renamed1", "Renamed2"]
+
+
+def test_deactivate_stopped_environment_uses_cached_status(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="TestEnv", image="testimage", comfyui_path="/tmp")
+    )
+    manager.load_environments()
+
+    def fail_get_container(container_id):
+        raise AssertionError("deactivating a stopped environment should not call Docker")
+
+    manager.docker_iface.get_container = fail_get_container
+    assert manager.deactivate_environment(created.id).status == "created"
+
+
+def test_dead_environments_are_not_polled(manager, fake_persistence):
+    live = manager.create_environment(
+        Environment(name="Live", image="testimage", comfyui_path="/tmp")
+    )
+    dead = manager.create_environment(
+        Environment(name="Dead", image="testimage", comfyui_path="/tmp")
+    )
+    del manager.docker_iface.containers[dead.id]
+    # Stored as dead, as a mutation saving a loaded environment would leave it.
+    for env in fake_persistence:
+        if env["id"] == dead.id:
+            env["status"] = "dead"
+    manager._invalidate_status_cache()
+
+    polled = []
+    get_statuses = manager.docker_iface.get_container_statuses
+
+    def recording_get_statuses(container_ids):
+        polled.append(sorted(container_ids))
+        return get_statuses(container_ids)
+
+    manager.docker_iface.get_container_statuses = recording_get_statuses
+    statuses = {e.id: e.status for e in manager.load_environments()}
+    assert statuses == {live.id: "created", dead.id: "dead"}
+    assert manager.get_environment_statuses() == statuses
+    assert polled == [[live.id]]
+
+
+def test_unchanged_environments_are_not_saved(manager, fake_persistence, persistence_calls):
+    created = manager.create_environment(
+        Environment(name="TestEnv", image="testimage", comfyui_path="/tmp")
+    )
+    persistence_calls.clear()
+
+    manager.update_environment(created.id, EnvironmentUpdate(name="TestEnv"))
+    assert persistence_calls["save"] == 0
+    manager.update_environment(created.id, EnvironmentUpdate(name="Renamed"))
+    assert persistence_calls["save"] == 1
+
+
+def test_load_environments_json_is_reused_until_something_changes(manager, fake_persistence, persistence_calls):
+    created = manager.create_environment(
+        Environment(name="TestEnv", image="testimage", comfyui_path="/tmp")
+    )
+    persistence_calls.clear()
+    manager._status_events_monitored = True
+
+    manager.load_environments_json()
+    first = manager.load_environments_json()
+    assert manager.load_environments_json() is first
+    assert persistence_calls["load"] == 2
+
+    manager.update_environment(created.id, EnvironmentUpdate(name="Renamed"))
+    assert json.loads(manager.load_environments_json())[0]["name"] == "Renamed"
+
+    manager._apply_status_event(created.id, "start")
+    assert json.loads(manager.load_environments_json())[0]["status"] == "running"
+
+
+def test_docker_event_bursts_are_broadcast_once(manager, fake_persistence, monkeypatch):
+    monkeypatch.setattr(src.comfydock_core.environment, "NOTIFY_DEBOUNCE", 0.01)
+    broadcasts = []
+
+    class FakeWebSocketManager:
+        async def broadcast(self, message):
+            broadcasts.append(message)
+
+    async def event_listener():
+        for action in ["create", "start", "stop"]:
+            yield {"Type": "container", "Action": action, "id": "container_1"}
+        await asyncio.sleep(0.1)
+        yield {"Type": "container", "Action": "destroy", "id": "container_1"}
+        await asyncio.sleep(0.1)
+
+    manager.ws_manager = FakeWebSocketManager()
+    manager.docker_iface.event_listener = event_listener
+    asyncio.run(manager.monitor_docker_events())
+    assert broadcasts == [{"type": "environments_update"}] * 2
+
+
+def test_duplicate_builds_config_while_committing(manager, fake_persistence):
+    created = manager.create_environment(
+        Environment(name="Original", image="testimage", comfyui_path="/tmp")
+    )
+    manager.activate_environment(created.id)
+    config_built = threading.Event()
+    create_mounts = manager.docker_iface.create_mounts
+
+    def recording_create_mounts(mount_config, comfyui_path):
+        config_built.set()
+        return create_mounts(mount_config, comfyui_path)
+
+    def slow_commit(container, repository, tag):
+        # Only returns once the config was built alongside the commit.
+        assert config_built.wait(5)
+
+    manager.docker_iface.create_mounts = recording_create_mounts
+    manager.docker_iface.commit_container = slow_commit
+    duplicate = manager.duplicate_environment(
+        created.id, Environment(name="Copy", image="testimage", comfyui_path="/tmp")
+    )
+    assert duplicate.image.startswith("comfy-env-clone")
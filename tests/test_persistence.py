@@ -5,7 +5,13 @@ import pytest
 from unittest.mock import patch
 from filelock import Timeout
 
-from src.comfydock_core.persistence import load_environments, save_environments, PersistenceError
+from src.comfydock_core.persistence import (
+    load_environments,
+    load_environments_json,
+    save_environments,
+    save_environments_json,
+    PersistenceError,
+)
 
 
 @pytest.fixture
@@ -38,6 +44,28 @@ def test_save_and_load_environments(temp_files):
     assert loaded == data
 
 
+def test_save_environments_json_round_trip(temp_files):
+    """
+    Save pre-serialized JSON bytes and load them back as environment dictionaries.
+    """
+    db_file, lock_file = temp_files
+    save_environments_json(
+        b'[{"id": "env1", "name": "Test Environment"}]',
+        db_file=db_file,
+        lock_file=lock_file,
+    )
+    loaded = load_environments(db_file=db_file, lock_file=lock_file)
+    assert loaded == [{"id": "env1", "name": "Test Environment"}]
+
+
+def test_load_environments_json_missing_file_returns_empty_list(temp_files):
+    """
+    If the database file does not exist, load_environments_json should return an empty JSON list.
+    """
+    db_file, lock_file = temp_files
+    assert load_environments_json(db_file=db_file, lock_file=lock_file) == b"[]"
+
+
 def test_load_corrupt_json_raises_error(temp_files):
     """
     Write invalid JSON to the file and ensure load_environments raises a PersistenceError.
@@ -52,11 +80,42 @@ def test_load_corrupt_json_raises_error(temp_files):
 
 def test_lock_timeout_raises_error(temp_files):
     """
-    Simulate a file lock Timeout and ensure load_environments raises a PersistenceError.
+    Simulate a file lock Timeout and ensure save_environments raises a PersistenceError.
     This uses unittest.mock.patch to force FileLock.__enter__ to raise a Timeout.
     """
     db_file, lock_file = temp_files
     with patch("filelock.FileLock.__enter__", side_effect=Timeout("Timeout raised")):
         with pytest.raises(PersistenceError) as excinfo:
-            load_environments(db_file=db_file, lock_file=lock_file)
-        assert "Could not acquire file lock for loading environments" in str(excinfo.value)
+            save_environments([{"id": "env1"}], db_file=db_file, lock_file=lock_file)
+        assert "Could not acquire file lock for saving environments" in str(excinfo.value)
+
+
+def test_load_environments_does_not_wait_for_lock(temp_files):
+    """
+    Loading does not take the file lock held by writers.
+    """
+    db_file, lock_file = temp_files
+    save_environments([{"id": "env1"}], db_file=db_file, lock_file=lock_file)
+    with patch("filelock.FileLock.__enter__", side_effect=Timeout("Timeout raised")):
+        assert load_environments(db_file=db_file, lock_file=lock_file) == [{"id": "env1"}]
+
+
+def test_save_replaces_file_without_leaving_temp_files(temp_files):
+    """
+    Saving writes through a temporary file that is renamed over the database.
+    """
+    db_file, lock_file = temp_files
+    save_environments_json(b"[]", db_file=db_file, lock_file=lock_file)
+    save_environments([{"id": "env1"}], db_file=db_file, lock_file=lock_file)
+    assert [p.name for p in Path(db_file).parent.iterdir() if p.suffix == ".tmp"] == []
+    assert load_environments(db_file=db_file, lock_file=lock_file) == [{"id": "env1"}]
+
+
+def test_load_environments_json_does_not_wait_for_lock(temp_files):
+    """
+    Reading the raw JSON does not take the file lock held by writers.
+    """
+    db_file, lock_file = temp_files
+    save_environments_json(b'[{"id": "env1"}]', db_file=db_file, lock_file=lock_file)
+    with patch("filelock.FileLock.__enter__", side_effect=Timeout("Timeout raised")):
+        assert load_environments_json(db_file=db_file, lock_file=lock_file) == b'[{"id": "env1"}]'
@@ -1,6 +1,9 @@
 # test_user_settings.py
 
 import pytest
+from filelock import FileLock
+from src.comfydock_core.environment import Environment
+import src.comfydock_core.user_settings as user_settings_module
 from src.comfydock_core.user_settings import UserSettingsManager, UserSettings, UserSettingsError, UserSettingsNotFoundError, Folder
 
 # To run: uv run pytest .\tests\test_user_settings.py
@@ -204,3 +207,79 @@ def test_delete_nonexistent_folder(settings_manager):
     envs = []
     with pytest.raises(ValueError, match="Folder not found"):
         settings_manager.delete_folder(settings, "nonexistent-id", envs)
+
+def test_load_does_not_wait_for_lock(settings_manager):
+    """Test that loading settings succeeds while another process holds the lock"""
+    settings_manager.save(UserSettings(comfyui_path="/path"))
+    with FileLock(settings_manager.lock_file):
+        assert settings_manager.load().comfyui_path == "/path"
+
+def test_save_leaves_no_temp_files(settings_manager):
+    """Test that saving replaces the settings file without leaving temp files behind"""
+    settings_manager.save(UserSettings(comfyui_path="/first"))
+    settings_manager.save(UserSettings(comfyui_path="/second"))
+
+    assert settings_manager.load().comfyui_path == "/second"
+    assert not list(settings_manager.settings_file.parent.glob("*.tmp"))
+
+def test_load_reuses_parsed_settings_until_file_changes(settings_manager, monkeypatch):
+    """Test that unchanged settings are not re-parsed and loads return independent copies"""
+    settings_manager.settings_file.write_text('{"comfyui_path": "/path"}')
+    parses = []
+    real_from_json = user_settings_module.from_json
+    monkeypatch.setattr(
+        user_settings_module, "from_json", lambda data: parses.append(1) or real_from_json(data)
+    )
+
+    first = settings_manager.load()
+    first.folders.append(Folder(id="f1", name="Scratch"))
+    second = settings_manager.load()
+    assert len(parses) == 1
+    assert second.folders == []
+
+    # Saving keeps the written settings, so they are not parsed back.
+    settings_manager.save(UserSettings(comfyui_path="/other/path"))
+    assert settings_manager.load().comfyui_path == "/other/path"
+    assert len(parses) == 1
+
+    # A change made outside this manager is picked up.
+    settings_manager.settings_file.write_text('{"comfyui_path": "/external/path"}')
+    assert settings_manager.load().comfyui_path == "/external/path"
+    assert len(parses) == 2
+
+def test_load_settings_path_is_directory(settings_manager):
+    """Test that a directory at the settings path raises UserSettingsError"""
+    settings_manager.settings_file.mkdir()
+    with pytest.raises(UserSettingsError):
+        settings_manager.load()
+
+def test_delete_folders(settings_manager):
+    """Test deleting several folders at once, all or nothing"""
+    settings = UserSettings(folders=[
+        Folder(id="a", name="A"),
+        Folder(id="b", name="B"),
+        Folder(id="c", name="C"),
+    ])
+    envs = [Environment(name="Env", image="img", folderIds=["c"])]
+
+    with pytest.raises(ValueError, match="Folder contains environments"):
+        settings_manager.delete_folders(settings, ["a", "c"], envs)
+    with pytest.raises(ValueError, match="Folder not found"):
+        settings_manager.delete_folders(settings, ["a", "missing"], envs)
+    assert [f.id for f in settings.folders] == ["a", "b", "c"]
+
+    updated_settings = settings_manager.delete_folders(settings, ["a", "b"], envs)
+    assert [f.id for f in updated_settings.folders] == ["c"]
+
+def test_update_without_changes_does_not_save(settings_manager, monkeypatch):
+    """Test that an update that changes nothing does not rewrite the settings file"""
+    settings_manager.save(UserSettings(comfyui_path="/path", port="8188"))
+    saves = []
+    monkeypatch.setattr(settings_manager, "save", lambda settings: saves.append(settings))
+
+    assert settings_manager.update({}).comfyui_path == "/path"
+    assert settings_manager.update({"port": "8188"}).port == "8188"
+    assert saves == []
+
+    settings_manager.update({"port": "9000"})
+    assert len(saves) == 1
@@ -1,5 +1,7 @@
+import os
+
 import pytest
-from src.comfydock_core.utils import parse_ports
+from src.comfydock_core.utils import atomic_write, parse_ports
 
 # ---------------------------------------------------------------------------
 # Positive cases
@@ -223,4 +225,22 @@ def test_ip_binding_with_multiple_host_ports_error():
 
 def test_mismatched_list_lengths_error():
     with pytest.raises(ValueError):
-        parse_ports("8080,8081:8188,8189,8190")
\ No newline at end of file
+        parse_ports("8080,8081:8188,8189,8190")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_atomic_write_keeps_file_mode(tmp_path):
+    path = tmp_path / "environments.json"
+    umask = os.umask(0o027)
+    try:
+        atomic_write(str(path), b"[]")
+    finally:
+        os.umask(umask)
+    # A new file gets the mode open() would give it under the current umask.
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ["environments.json"]
+
+    path.chmod(0o604)
+    atomic_write(str(path), b"[{}]")
+    assert path.read_bytes() == b"[{}]"
+    assert path.stat().st_mode & 0o777 == 0o604